@@ -0,0 +1,7 @@
+# Grid pathfinding and maze generation. The package only needs NumPy: pygame is imported by visualize.visualize()
+# when the window is opened, and Numba by accel when the compiled backend is used
+from .grid import Grid, PATH, WALL, START, GOAL, OPEN, CLOSED, SOLUTION
+from .engine import get_path_cost, run_search, searches_by_name
+from .heuristics import heuristics_by_name
+from .maze_generators import generate_maze, mazes_by_name
+from .grid_io import save_grid, load_grid
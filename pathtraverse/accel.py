@@ -0,0 +1,411 @@
+# Optional compiled backend. The expansion loops of A*, Dijkstra and BFS and the iterative backtracker maze are
+# written again here as kernels over the flat grid arrays and compiled with Numba when it is installed
+# (pip install numba). They follow the Python versions step by step, down to the queue's tie-breaking and the random
+# numbers the maze draws, so both backends give identical events, paths and mazes. The kernels run the whole search
+# at once and record its events, which the generators then yield like the engine's (grid.state is already final when
+# the first event comes out).
+# Without Numba the kernels would run as (slow) plain Python, so accelerated() hands back the engine's own generators
+import numpy as np
+from .components import get_components
+from .grid import Grid, PATH, OPEN, CLOSED, move_lengths
+from .heuristics import octile, heuristic_field
+from .tile_queues import BucketQueue
+from . import engine, maze_generators
+
+try:
+    from numba import njit
+    available = True
+except ImportError:
+    available = False
+
+    def njit(*args, **kwargs):  # leaves the kernels as plain Python
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+
+def accelerated(steps):  # the compiled version of a search/maze generator if there is one and Numba is installed
+    if not available:
+        return steps
+    return compiled_versions.get(steps, steps)
+
+
+def warm_up():  # compiles the kernels now instead of in the first search/maze that uses them
+    grid = Grid(9, 9)
+    for steps in (a_star_steps, dijkstra_steps, breadth_first_steps):
+        engine.run_search(steps(grid, (0, 0), (8, 8)))
+    maze_generators.generate_maze(grid, iterative_backtrack_maze, 0)
+
+
+def _events(count, event_tiles, event_states):
+    return zip(event_tiles[:count].tolist(), event_states[:count].tolist())
+
+
+def a_star_steps(grid, start, goal, heuristic=octile):
+    return _best_first_steps(grid, start, goal, heuristic)
+
+
+def dijkstra_steps(grid, start, goal):
+    return _best_first_steps(grid, start, goal, None)
+
+
+def _best_first_steps(grid, start, goal, heuristic):
+    grid.clear_search()
+    if not get_components(grid).connected(start, goal):
+        return None
+    weight, heuristic_scale = engine.get_search_weights(grid)
+    if heuristic:
+        scores = heuristic_field(grid, goal, heuristic).reshape(-1)
+        bucket_width, bucket_count = 0.0, 0
+    else:
+        scores = np.zeros(0)
+        queue = engine.make_dijkstra_queue(grid)  # the same queue as the Python Dijkstra, buckets or a heap
+        bucket_width, bucket_count = ((queue.bucket_width, len(queue.buckets)) if isinstance(queue, BucketQueue)
+                                      else (0.0, 0))
+    found, event_tiles, event_states, count = _best_first_kernel(
+        grid.state.reshape(-1), grid.moves.reshape(-1), grid.g.reshape(-1), grid.f.reshape(-1),
+        grid.parent.reshape(-1), weight, scores, heuristic_scale, np.array(grid.offsets, np.int64),
+        np.array(move_lengths), grid.index(*start), grid.index(*goal), float(bucket_width), bucket_count)
+    yield from _events(count, event_tiles, event_states)
+    return grid.get_path(grid.index(*goal)) if found else None
+
+
+def breadth_first_steps(grid, start, goal):
+    grid.clear_search()
+    if tuple(start) == tuple(goal):  # like engine.breadth_first_steps
+        return [start]
+    if not get_components(grid).connected(start, goal):
+        return None
+    found, event_tiles, event_states, count = _breadth_first_kernel(
+        grid.state.reshape(-1), grid.moves.reshape(-1), grid.parent.reshape(-1), np.array(grid.offsets, np.int64),
+        grid.index(*start), grid.index(*goal))
+    yield from _events(count, event_tiles, event_states)
+    return grid.get_path(grid.index(*goal)) if found else None
+
+
+def iterative_backtrack_maze(grid, rng=maze_generators.random):
+    # The random numbers come from a copy of rng's Mersenne Twister state that is written back afterwards, so the
+    # maze and everything drawn from rng after it are the same as with the Python generator
+    columns, rows = maze_generators._cells(grid)
+    grid.fill_walls()
+    version, internal_state, gauss_next = rng.getstate()
+    twister = np.array(internal_state, np.int64)  # 624 words and the position in them
+    start, carved, count = _backtrack_kernel(grid.state.reshape(-1), columns, rows, grid.height, twister)
+    rng.setstate((version, tuple(int(word) for word in twister), gauss_next))
+    for tile in carved[:count].tolist():
+        yield tile, PATH
+    grid.build_moves()
+    return grid.coord(maze_generators._cell_tile(start, rows, grid.height))
+
+
+# Kernels. Plain loops over NumPy arrays only, so Numba can compile them
+
+
+@njit(cache=True)
+def _heap_less(first, second, priorities, counters):  # [priority, count] < [priority, count] like PriorityQueue
+    if priorities[first] != priorities[second]:
+        return priorities[first] < priorities[second]
+    return counters[first] < counters[second]
+
+
+@njit(cache=True)
+def _heap_sift_up(heap, positions, priorities, counters, index):
+    item = heap[index]
+    while index > 0:
+        parent_index = (index - 1) >> 1
+        if _heap_less(item, heap[parent_index], priorities, counters):
+            heap[index] = heap[parent_index]
+            positions[heap[index]] = index
+            index = parent_index
+        else:
+            break
+    heap[index] = item
+    positions[item] = index
+
+
+@njit(cache=True)
+def _heap_sift_down(heap, positions, priorities, counters, index, size):
+    item = heap[index]
+    while True:
+        child_index = 2 * index + 1
+        if child_index >= size:
+            break
+        right_index = child_index + 1
+        if right_index < size and _heap_less(heap[right_index], heap[child_index], priorities, counters):
+            child_index = right_index
+        if _heap_less(heap[child_index], item, priorities, counters):
+            heap[index] = heap[child_index]
+            positions[heap[index]] = index
+            index = child_index
+        else:
+            break
+    heap[index] = item
+    positions[item] = index
+
+
+@njit(cache=True)
+def _heap_insert(tile, priority, queued, priorities, heap, positions, counters, heap_counts):
+    # PriorityQueue.insert: a queued tile keeps its count and moves up or down. heap_counts is [size, counter]
+    if queued[tile]:
+        old_priority = priorities[tile]
+        priorities[tile] = priority
+        if priority < old_priority:
+            _heap_sift_up(heap, positions, priorities, counters, positions[tile])
+        else:
+            _heap_sift_down(heap, positions, priorities, counters, positions[tile], heap_counts[0])
+        return
+    queued[tile] = True
+    priorities[tile] = priority
+    counters[tile] = heap_counts[1]
+    heap_counts[1] += 1
+    heap[heap_counts[0]] = tile
+    heap_counts[0] += 1
+    _heap_sift_up(heap, positions, priorities, counters, heap_counts[0] - 1)
+
+
+@njit(cache=True)
+def _heap_remove(queued, priorities, heap, positions, counters, heap_counts):
+    tile = heap[0]
+    heap_counts[0] -= 1
+    size = heap_counts[0]
+    if size:
+        heap[0] = heap[size]
+        positions[heap[0]] = 0
+        _heap_sift_down(heap, positions, priorities, counters, 0, size)
+    queued[tile] = False
+    return tile
+
+
+@njit(cache=True)
+def _bucket_insert(tile, priority, queued, priorities, buckets, bucket_counts, bucket_width):
+    # BucketQueue.insert. buckets is (heads, entry tiles, entry priorities, next entry): every bucket is a stack of
+    # entries chained from its head. bucket_counts is [entries, current bucket, queued tiles]. Returns buckets, whose
+    # entry arrays are reallocated twice as long when they are full
+    heads, entry_tiles, entry_priorities, entry_next = buckets
+    entries = bucket_counts[0]
+    if entries == entry_tiles.size:
+        entry_tiles = np.concatenate((entry_tiles, np.empty(entries, np.int64)))
+        entry_priorities = np.concatenate((entry_priorities, np.empty(entries)))
+        entry_next = np.concatenate((entry_next, np.empty(entries, np.int64)))
+    bucket = int(priority // bucket_width)
+    if bucket_counts[2] == 0 or bucket < bucket_counts[1]:
+        bucket_counts[1] = bucket
+    if not queued[tile]:
+        bucket_counts[2] += 1
+    queued[tile] = True
+    priorities[tile] = priority
+    slot = bucket % heads.size
+    entry_tiles[entries] = tile
+    entry_priorities[entries] = priority
+    entry_next[entries] = heads[slot]
+    heads[slot] = entries
+    bucket_counts[0] += 1
+    return heads, entry_tiles, entry_priorities, entry_next
+
+
+@njit(cache=True)
+def _bucket_remove(queued, priorities, buckets, bucket_counts):  # BucketQueue.remove, outdated entries are skipped
+    heads, entry_tiles, entry_priorities, entry_next = buckets
+    while True:
+        slot = bucket_counts[1] % heads.size
+        while heads[slot] != -1:
+            entry = heads[slot]
+            heads[slot] = entry_next[entry]
+            tile = entry_tiles[entry]
+            if queued[tile] and priorities[tile] == entry_priorities[entry]:
+                queued[tile] = False
+                bucket_counts[2] -= 1
+                return tile
+        bucket_counts[1] += 1
+
+
+@njit(cache=True)
+def _best_first_kernel(state, moves, g, f, parent, weight, scores, heuristic_scale, offsets, lengths, start_index,
+                       goal_index, bucket_width, bucket_count):
+    # engine._best_first_steps. The queue is the PriorityQueue, or the BucketQueue when bucket_count is set.
+    # Returns whether the goal was reached and the events
+    size = state.size
+    event_tiles = np.empty(2 * size, np.int32)
+    event_states = np.empty(2 * size, np.uint8)
+    count = 0
+    use_buckets = bucket_count > 0
+    queued = np.zeros(size, np.bool_)
+    priorities = np.empty(size)
+    heap = np.empty(size, np.int64)
+    positions = np.empty(size, np.int64)
+    counters = np.empty(size, np.int64)
+    heap_counts = np.zeros(2, np.int64)
+    buckets = (np.full(max(bucket_count, 1), -1, np.int64), np.empty(size + 1, np.int64), np.empty(size + 1),
+               np.empty(size + 1, np.int64))
+    bucket_counts = np.zeros(3, np.int64)
+
+    g[start_index] = 0
+    f[start_index] = heuristic_scale * scores[start_index] if scores.size else 0.0
+    if use_buckets:
+        buckets = _bucket_insert(start_index, f[start_index], queued, priorities, buckets, bucket_counts, bucket_width)
+    else:
+        _heap_insert(start_index, f[start_index], queued, priorities, heap, positions, counters, heap_counts)
+
+    while (bucket_counts[2] if use_buckets else heap_counts[0]) != 0:
+        if use_buckets:
+            current = _bucket_remove(queued, priorities, buckets, bucket_counts)
+        else:
+            current = _heap_remove(queued, priorities, heap, positions, counters, heap_counts)
+        if current == goal_index:
+            return True, event_tiles, event_states, count
+
+        if current != start_index:
+            state[current] = CLOSED
+            event_tiles[count] = current
+            event_states[count] = CLOSED
+            count += 1
+
+        mask = moves[current]
+        for direction in range(8):
+            if not mask >> direction & 1:
+                continue
+            neighbor = current + offsets[direction]
+            if state[neighbor] == CLOSED or neighbor == start_index:
+                continue
+
+            new_g = g[current] + lengths[direction] * weight[neighbor]
+            if new_g < g[neighbor]:
+                g[neighbor] = new_g
+                parent[neighbor] = current
+                f[neighbor] = new_g
+                if scores.size:
+                    f[neighbor] += heuristic_scale * scores[neighbor]
+                was_queued = queued[neighbor]
+                if use_buckets:
+                    buckets = _bucket_insert(neighbor, f[neighbor], queued, priorities, buckets, bucket_counts,
+                                             bucket_width)
+                else:
+                    _heap_insert(neighbor, f[neighbor], queued, priorities, heap, positions, counters, heap_counts)
+                if not was_queued and neighbor != goal_index:
+                    state[neighbor] = OPEN
+                    event_tiles[count] = neighbor
+                    event_states[count] = OPEN
+                    count += 1
+    return False, event_tiles, event_states, count
+
+
+@njit(cache=True)
+def _breadth_first_kernel(state, moves, parent, offsets, start_index, goal_index):
+    # engine._first_visit_steps in breadth first order, with a flat array as the FIFO (every tile is queued once)
+    size = state.size
+    event_tiles = np.empty(2 * size, np.int32)
+    event_states = np.empty(2 * size, np.uint8)
+    count = 0
+    queue = np.empty(size, np.int64)
+    queue[0] = start_index
+    head, tail = 0, 1
+    while head != tail:
+        current = queue[head]
+        head += 1
+        if current != start_index:
+            state[current] = CLOSED
+            event_tiles[count] = current
+            event_states[count] = CLOSED
+            count += 1
+
+        mask = moves[current] & 15
+        for direction in range(4):
+            if not mask >> direction & 1:
+                continue
+            neighbor = current + offsets[direction]
+            if parent[neighbor] == -1 and neighbor != start_index:
+                parent[neighbor] = current
+                if neighbor == goal_index:
+                    return True, event_tiles, event_states, count
+                queue[tail] = neighbor
+                tail += 1
+                state[neighbor] = OPEN
+                event_tiles[count] = neighbor
+                event_states[count] = OPEN
+                count += 1
+    return False, event_tiles, event_states, count
+
+
+@njit(cache=True)
+def _next_word(twister):
+    # genrand_uint32 of CPython's Mersenne Twister (the random module): twister holds its 624 words and then the
+    # position of the next one to temper
+    position = twister[624]
+    if position >= 624:
+        for word in range(624):
+            y = (twister[word] & 0x80000000) | (twister[(word + 1) % 624] & 0x7fffffff)
+            value = twister[(word + 397) % 624] ^ (y >> 1)
+            if y & 1:
+                value ^= 0x9908b0df
+            twister[word] = value
+        position = 0
+    y = np.int64(twister[position])
+    twister[624] = position + 1
+    y ^= y >> 11
+    y ^= (y << 7) & 0x9d2c5680
+    y ^= (y << 15) & 0xefc60000
+    y ^= y >> 18
+    return y
+
+
+@njit(cache=True)
+def _random_below(twister, n):  # Random._randbelow: the top bits of a word, drawn again until they are below n
+    bits = 0
+    while n >> bits:
+        bits += 1
+    value = _next_word(twister) >> (32 - bits)
+    while value >= n:
+        value = _next_word(twister) >> (32 - bits)
+    return value
+
+
+@njit(cache=True)
+def _backtrack_kernel(state, columns, rows, height, twister):
+    # maze_generators.iterative_backtrack_maze, drawing from the twister where it calls randrange/choice. Returns the
+    # start cell and the carved tiles
+    total = columns * rows
+    visited = np.zeros(total, np.bool_)
+    carved = np.empty(2 * total, np.int64)
+    stack = np.empty(total, np.int64)
+    unvisited = np.empty(4, np.int64)
+
+    start = _random_below(twister, total)
+    visited[start] = True
+    tile = (2 * (start // rows) + 1) * height + 2 * (start % rows) + 1
+    state[tile] = PATH
+    carved[0] = tile
+    count = 1
+    stack[0] = start
+    depth = 1
+    while depth:
+        cell = stack[depth - 1]
+        x, y = cell // rows, cell % rows
+        choices = 0
+        for neighbor, inside in ((cell - 1, y > 0), (cell + 1, y < rows - 1), (cell - rows, x > 0),
+                                 (cell + rows, x < columns - 1)):  # N, S, W, E like _cell_neighbors
+            if inside and not visited[neighbor]:
+                unvisited[choices] = neighbor
+                choices += 1
+        if not choices:
+            depth -= 1
+            continue
+        neighbor = unvisited[_random_below(twister, choices)]
+        visited[neighbor] = True
+        tile = (2 * x + 1) * height + 2 * y + 1
+        neighbor_tile = (2 * (neighbor // rows) + 1) * height + 2 * (neighbor % rows) + 1
+        for opened in ((tile + neighbor_tile) // 2, neighbor_tile):
+            state[opened] = PATH
+            carved[count] = opened
+            count += 1
+        stack[depth] = neighbor
+        depth += 1
+    return start, carved, count
+
+
+# engine/maze_generators generator -> its compiled version
+compiled_versions = {
+    engine.a_star_steps: a_star_steps,
+    engine.dijkstra_steps: dijkstra_steps,
+    engine.breadth_first_steps: breadth_first_steps,
+    maze_generators.iterative_backtrack_maze: iterative_backtrack_maze
+}
@@ -0,0 +1,125 @@
+# Batch pathfinding: answers many (start, goal) queries against the same static grid. The score arrays are allocated
+# once and reused between searches through generation stamps instead of being cleared, and every query with the same
+# start shares one search tree
+import numpy as np
+from .components import get_components
+from .engine import make_dijkstra_queue
+from .grid import move_directions, move_lengths
+from .heuristics import octile
+from .tile_queues import PriorityQueue
+
+
+class SearchState:
+    # g/parent of a tile are only valid while stamp[tile] == generation, so starting a new search is just
+    # generation += 1 instead of refilling the arrays
+    def __init__(self, size):
+        self.g = np.empty(size)
+        self.parent = np.empty(size, np.int32)
+        self.stamp = np.zeros(size, np.uint32)
+        self.closed = np.zeros(size, np.uint32)  # generation the tile was closed in
+        self.generation = 0
+
+    def next_generation(self):
+        self.generation += 1
+        if self.generation == np.iinfo(np.uint32).max:  # wrapped around, the old stamps are ambiguous now
+            self.stamp.fill(0)
+            self.closed.fill(0)
+            self.generation = 1
+        return self.generation
+
+
+class BatchPlanner:
+    def __init__(self, grid):
+        self.grid = grid
+        self.search_state = SearchState(grid.width * grid.height)
+        self.searches = 0  # number of search trees grown, one per distinct start
+        # the grid is static, so the weights are looked at once. Uniform terrain skips the per-move weight lookup
+        self.min_weight, max_weight = grid.weight_range()
+        self.weights = None if self.min_weight == max_weight else grid.weight.reshape(-1).astype(float)
+
+    def find_paths(self, queries):
+        # queries is a list of (start, goal) coords. Returns [(path, cost), ...] in the same order, (None, inf) when
+        # the goal can't be reached
+        results = [None] * len(queries)
+        by_start = {}
+        for query_index, (start, goal) in enumerate(queries):
+            by_start.setdefault(tuple(start), []).append((query_index, tuple(goal)))
+
+        components = get_components(self.grid)
+        for start, group in by_start.items():
+            # goals in another component are answered without growing the tree until it runs out
+            goals = {goal for _, goal in group if components.connected(start, goal)}
+            if not goals:
+                for query_index, _ in group:
+                    results[query_index] = (None, np.inf)
+                continue
+            found = self.search(start, goals)
+            for query_index, goal in group:
+                results[query_index] = found.get(goal, (None, np.inf))
+        return results
+
+    def search(self, start, goals):
+        # Grows one tree from start until every goal is closed. A single goal is searched with A* (octile),
+        # several goals with Dijkstra so the tree is valid for all of them. Moves cost length * weight like the engine
+        grid = self.grid
+        search_state = self.search_state
+        generation = search_state.next_generation()
+        self.searches += 1
+        g, parent, stamp, closed = search_state.g, search_state.parent, search_state.stamp, search_state.closed
+        moves = grid.moves.reshape(-1)
+        offsets = grid.offsets
+        height = grid.height
+        weights = self.weights
+        min_weight = self.min_weight
+        start_index = grid.index(*start)
+        remaining = {grid.index(*goal): goal for goal in goals}
+        if len(goals) == 1:
+            goal_x, goal_y = next(iter(goals))
+        else:
+            goal_x = None
+
+        found = {}
+        if not grid.walkable(*start):
+            return found
+        g[start_index] = 0
+        parent[start_index] = -1
+        stamp[start_index] = generation
+        open_queue = PriorityQueue() if goal_x is not None else make_dijkstra_queue(grid)
+        open_queue.insert(start_index, 0)
+
+        while not open_queue.is_empty() and remaining:
+            current = open_queue.remove()
+            closed[current] = generation
+            if current in remaining:
+                found[remaining.pop(current)] = (self.get_path(current), float(g[current]))
+
+            for direction in move_directions[moves[current]]:
+                neighbor = current + offsets[direction]
+                if closed[neighbor] == generation:
+                    continue
+                if weights is None:
+                    new_g = g[current] + move_lengths[direction] * min_weight
+                else:
+                    new_g = g[current] + move_lengths[direction] * weights[neighbor]
+                if stamp[neighbor] != generation or new_g < g[neighbor]:
+                    stamp[neighbor] = generation
+                    g[neighbor] = new_g
+                    parent[neighbor] = current
+                    priority = new_g
+                    if goal_x is not None:
+                        x, y = divmod(neighbor, height)
+                        priority += min_weight * octile(abs(x - goal_x), abs(y - goal_y))
+                    open_queue.insert(neighbor, priority)
+        return found
+
+    def get_path(self, index):
+        parent = self.search_state.parent
+        path = [index]
+        while parent[path[-1]] != -1:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+        return [self.grid.coord(tile) for tile in path]
+
+
+def batch_search(grid, queries):
+    return BatchPlanner(grid).find_paths(queries)
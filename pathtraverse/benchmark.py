@@ -0,0 +1,253 @@
+# Headless benchmarks of every search and maze generator over a range of grid sizes, random obstacle densities and
+# maze types. Reports wall time, tiles expanded, peak open list size, peak memory and path cost, can write them as
+# JSON and compare a run against a stored baseline:
+#   python -m pathtraverse benchmark --sizes 100 500 --json results.json
+#   python -m pathtraverse benchmark --sizes 100 500 --baseline results.json
+#   python -m pathtraverse benchmark --sizes 1000 --backends python numba
+# The open list size is counted from the OPEN/CLOSED events the searches yield (tiles waiting on the board). Peak
+# memory comes from a second, traced run so tracemalloc doesn't slow down the timed one. With several backends the
+# searches/mazes with compiled kernels (see accel.py) run on each and the speedups over Python are printed at the end
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from .components import get_components
+from .engine import get_path_cost, run_search, searches_by_name
+from .fields import find_field, flow_field_steps
+from .grid import Grid, PATH, WALL, OPEN, CLOSED
+from .maze_generators import generate_maze, mazes_by_name
+
+
+class SearchCounter:  # on_visit that keeps the expanded/open counts of a search
+    def __init__(self):
+        self.expanded = 0
+        self.open = 0
+        self.peak_open = 0
+
+    def __call__(self, index, state):
+        if state == OPEN:
+            self.open += 1
+            if self.open > self.peak_open:
+                self.peak_open = self.open
+        elif state == CLOSED:
+            self.expanded += 1
+            self.open -= 1
+
+
+def random_map(size, density, seed):  # walls placed with probability density, the corners kept free
+    rng = np.random.default_rng(seed)
+    state = np.where(rng.random((size, size)) < density, WALL, PATH).astype(np.uint8)
+    state[0, 0] = state[-1, -1] = PATH
+    return Grid(size, size, state=state), (0, 0), (size - 1, size - 1)
+
+
+def maze_map(size, maze_name, seed, maze=None):  # a maze between its first and last cells
+    # maze is the generator to use instead of mazes_by_name[maze_name], e.g. its compiled version
+    grid = Grid(size, size)
+    generate_maze(grid, maze or mazes_by_name[maze_name], seed)
+    last = size - 1 if size % 2 == 0 else size - 2
+    return grid, (1, 1), (last, last)
+
+
+def run_traced(function):  # peak bytes allocated while function runs
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def backend_version(steps, backend):  # accel (and Numba with it) is only imported for the numba backend
+    if backend != "numba":
+        return steps
+    from . import accel
+    return accel.accelerated(steps)
+
+
+def drop_search_caches(grid):
+    # The caches a search builds for itself and keeps on the grid (HPA*'s cluster graph, the flow fields, JPS's wall
+    # bits), dropped so every timed run pays for building them. The connected components are shared by all the searches
+    # and stay
+    for cache in (grid.clusters, grid.fields, grid.wall_bits):
+        if cache is not None:
+            cache.close()
+
+
+def benchmark_search(name, grid, start, goal, repeat=1, memory=True, backend="python"):
+    steps = backend_version(searches_by_name[name], backend)
+    times = []
+    for _ in range(repeat):
+        drop_search_caches(grid)
+        counter = SearchCounter()
+        search = steps(grid, start, goal)
+        began = time.perf_counter()
+        path = run_search(search, counter)
+        times.append(time.perf_counter() - began)
+        field = find_field(grid, goal) if steps is flow_field_steps else None
+        if field is not None:  # it yields no events, computing the field was the work
+            counter.expanded, counter.peak_open = field.settled, field.peak_open
+    result = {
+        "time": min(times),
+        "expanded": counter.expanded,
+        "peak_open": counter.peak_open,
+        "cost": None if path is None else get_path_cost(path, grid),
+    }
+    if memory:
+        drop_search_caches(grid)
+        result["peak_memory"] = run_traced(lambda: run_search(steps(grid, start, goal)))
+    return result
+
+
+def benchmark_maze(name, size, seed, repeat=1, memory=True, backend="python"):
+    maze = backend_version(mazes_by_name[name], backend)
+    times = []
+    for _ in range(repeat):
+        grid = Grid(size, size)
+        began = time.perf_counter()
+        generate_maze(grid, maze, seed)
+        times.append(time.perf_counter() - began)
+    result = {"time": min(times), "carved": int((grid.state == PATH).sum())}
+    if memory:
+        grid = Grid(size, size)
+        result["peak_memory"] = run_traced(lambda: generate_maze(grid, maze, seed))
+    return result
+
+
+def run_benchmarks(sizes, densities, maze_names, search_names, seed=0, repeat=1, memory=True, log=print,
+                   backends=("python",)):
+    # python runs everything, other backends only what they have their own version of
+    def backends_of(function):
+        return [backend for backend in backends
+                if backend == "python" or backend_version(function, backend) is not function]
+
+    if "numba" in backends:
+        from . import accel
+        accel.warm_up()  # compiled before the timings
+    results = []
+    for size in sizes:
+        for maze_name in maze_names:
+            for backend in backends_of(mazes_by_name[maze_name]):
+                record = {"kind": "maze", "name": maze_name, "size": size, "map": "", "seed": seed,
+                          "backend": backend}
+                record.update(benchmark_maze(maze_name, size, seed, repeat, memory, backend))
+                results.append(record)
+                log(format_record(record))
+
+        maps = [(f"random {density:g}", lambda density=density: random_map(size, density, seed))
+                for density in densities]
+        maps += [(f"maze {maze_name}", lambda maze_name=maze_name: maze_map(size, maze_name, seed))
+                 for maze_name in maze_names]
+        for map_name, make_map in maps:
+            grid, start, goal = make_map()
+            get_components(grid).label()  # once per map, not in the first search's time
+            for search_name in search_names:
+                for backend in backends_of(searches_by_name[search_name]):
+                    record = {"kind": "search", "name": search_name, "size": size, "map": map_name, "seed": seed,
+                              "backend": backend}
+                    record.update(benchmark_search(search_name, grid, start, goal, repeat, memory, backend))
+                    results.append(record)
+                    log(format_record(record))
+    return results
+
+
+def format_record(record):
+    line = (f"{record['kind']:6} {record['name']:18} {record.get('backend', 'python'):6} {record['size']:5} "
+            f"{record['map']:20} {record['time']:9.4f}s")
+    if record["kind"] == "search":
+        cost = "no path" if record["cost"] is None else f"{record['cost']:.2f}"
+        line += f" expanded {record['expanded']:9} peak open {record['peak_open']:8} cost {cost:>10}"
+    else:
+        line += f" carved {record['carved']:9}"
+    if "peak_memory" in record:
+        line += f" memory {record['peak_memory'] / 2 ** 20:8.2f} MiB"
+    return line
+
+
+def record_key(record):  # results from before there were backends are python ones
+    return (record["kind"], record["name"], record["size"], record["map"], record["seed"],
+            record.get("backend", "python"))
+
+
+def speedups(results):  # how many times faster than python every other backend ran each benchmark
+    python_times = {record_key(record)[:5]: record["time"] for record in results
+                    if record.get("backend", "python") == "python"}
+    lines = []
+    for record in results:
+        python_time = python_times.get(record_key(record)[:5])
+        if record.get("backend", "python") != "python" and python_time and record["time"]:
+            label = " ".join(str(part) for part in record_key(record)[:4] if part != "")
+            lines.append(f"{label}: {record['backend']} {python_time / record['time']:.1f}x faster than python")
+    return lines
+
+
+def compare(results, baseline, tolerance=1.2):
+    # Regressions against a baseline run: anything tolerance times slower (or using more memory), and searches whose
+    # expanded count or path cost changed. Returns a list of messages
+    old_records = {record_key(record): record for record in baseline["results"]}
+    regressions = []
+    for record in results:
+        old = old_records.get(record_key(record))
+        if old is None:
+            continue
+        label = " ".join(str(part) for part in record_key(record)[:4] + record_key(record)[5:] if part != "")
+        for metric in ("time", "peak_memory"):
+            if metric in record and metric in old and old[metric] and record[metric] > old[metric] * tolerance:
+                regressions.append(f"{label}: {metric} {old[metric]:.4g} -> {record[metric]:.4g} "
+                                   f"({record[metric] / old[metric]:.2f}x)")
+        if record["kind"] == "search":
+            if record["expanded"] != old["expanded"]:
+                regressions.append(f"{label}: expanded {old['expanded']} -> {record['expanded']}")
+            old_cost, cost = old["cost"], record["cost"]
+            if (old_cost is None) != (cost is None) or (cost is not None and abs(cost - old_cost) > 1e-6):
+                regressions.append(f"{label}: cost {old_cost} -> {cost}")
+    return regressions
+
+
+def numba_available():
+    from . import accel
+    return accel.available
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the searches and maze generators headless")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000],
+                        help="grid sizes (square), up to 4000 takes a while")
+    parser.add_argument("--densities", type=float, nargs="*", default=[0, .2, .35], help="random wall densities")
+    parser.add_argument("--mazes", nargs="*", default=list(mazes_by_name), choices=list(mazes_by_name))
+    parser.add_argument("--searches", nargs="*", default=list(searches_by_name), choices=list(searches_by_name))
+    parser.add_argument("--backends", nargs="+", default=["python"], choices=["python", "numba"],
+                        help="numba runs the compiled A*, Dijkstra, BFS and Iterative maze too (needs numba)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark, the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced runs for peak memory")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against the results in this file")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="slowdown factor counted as a regression")
+    options = parser.parse_args(arguments)
+    if "numba" in options.backends and not numba_available():
+        parser.error("the numba backend needs numba (pip install numba)")
+
+    results = run_benchmarks(options.sizes, options.densities, options.mazes, options.searches, options.seed,
+                             options.repeat, not options.no_memory, backends=options.backends)
+    for line in speedups(results):
+        print(line)
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                       "date": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, file, indent=1)
+    if options.baseline:
+        with open(options.baseline) as file:
+            regressions = compare(results, json.load(file), options.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        print(f"{len(regressions)} regressions against {options.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# Chunked grid for worlds bigger than memory. The map is split into chunk_size x chunk_size chunks stored one after
+# another in a file, and a ChunkedGrid keeps only the recently used ones in memory (an LRU cache limited by a memory
+# budget in bytes), loading a chunk the first time a search touches one of its tiles and dropping (writing back, if
+# it was edited) the least recently used one when the budget is full. The hits/misses of the cache are counted for
+# tuning the chunk size and budget. Only the map data is limited by the budget, a search's own scores (the dicts in
+# a_star_steps) grow with the area it explores
+import math
+import random
+import struct
+from collections import OrderedDict
+import numpy as np
+from .grid import PATH, WALL, OPEN, CLOSED, directions, move_lengths
+from .grid_io import map_board
+from .heuristics import octile
+from .tile_queues import PriorityQueue
+
+MAGIC = b"PTCHUNK\0"
+VERSION = 1
+# magic, version, width, height, chunk size, flags, start x, start y, goal x, goal y (-1 when there is no start/goal),
+# the cheapest weight of a walkable tile (or less, it scales the heuristic so it has to be a lower bound)
+HEADER = struct.Struct("<8sIIIIIiiiif")
+HAS_WEIGHTS = 1
+# Every chunk is its tile states (a byte per tile, x * chunk_size + y within the chunk) and with HAS_WEIGHTS then its
+# float32 weights. Chunks on the far edges are full size too, the tiles past the map are walls
+CHUNKS_OFFSET = 64
+
+# the tiles around a tile in directions order, with the orthogonal moves a diagonal needs one of
+diagonal_checks = [None, None, None, None, (0, 1), (2, 1), (2, 3), (0, 3)]
+
+
+class Chunk:
+    def __init__(self, data, area, has_weights):
+        self.data = data  # the chunk as stored, written back as is
+        view = memoryview(data)
+        self.state = view[:area]
+        self.weight = view[area:].cast("f") if has_weights else None
+        self.dirty = False
+
+
+def create_chunked(path, width, height, chunk_size=256, has_weights=False, fill=None, start=None, goal=None):
+    # Writes a chunked world a chunk at a time, so it never has to fit in memory. fill(x, y, state, weight) fills in
+    # the chunk whose first tile is x, y: state is a (chunk_size, chunk_size) uint8 array of PATH and weight a float32
+    # one of 1s (None without weights), both indexed [x, y] like a Grid. Tiles past the edges are made walls after it
+    start_x, start_y = start if start is not None else (-1, -1)
+    goal_x, goal_y = goal if goal is not None else (-1, -1)
+    min_weight = np.inf
+    with open(path, "wb") as file:
+        file.write(bytes(CHUNKS_OFFSET))  # the header once the cheapest weight is known
+        for x in range(0, width, chunk_size):
+            for y in range(0, height, chunk_size):
+                state = np.full((chunk_size, chunk_size), PATH, np.uint8)
+                weight = np.ones((chunk_size, chunk_size), np.float32) if has_weights else None
+                if fill is not None:
+                    fill(x, y, state, weight)
+                state[width - x:, :] = WALL
+                state[:, height - y:] = WALL
+                file.write(state.tobytes())
+                if has_weights:
+                    file.write(weight.astype("<f4").tobytes())
+                    if (state != WALL).any():
+                        min_weight = min(min_weight, float(weight[state != WALL].min()))
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, width, height, chunk_size, HAS_WEIGHTS if has_weights else 0,
+                               start_x, start_y, goal_x, goal_y, min_weight if np.isfinite(min_weight) else 1.0))
+
+
+def save_chunked(grid, path, chunk_size=256, start=None, goal=None):  # a Grid (or memory-mapped board) to chunks
+    has_weights = bool((grid.weight != 1).any())
+
+    def fill(x, y, state, weight):
+        part = grid.state[x:x + chunk_size, y:y + chunk_size]
+        state[:part.shape[0], :part.shape[1]] = np.where(part == WALL, WALL, PATH)
+        if has_weights:
+            weight[:part.shape[0], :part.shape[1]] = grid.weight[x:x + chunk_size, y:y + chunk_size]
+
+    create_chunked(path, grid.width, grid.height, chunk_size, has_weights, fill, start, goal)
+
+
+def board_chunked(board, path, chunk_size=256):
+    # A board saved with grid_io.save_grid cut into chunks straight from the file: the walls of a column of chunks are
+    # unpacked from the board's bits when its first chunk is written, the weights are read through a memory map
+    width, height, walls, weights, start, goal = map_board(board)
+    strip = {"x": None}  # the unpacked walls of the current column of chunks, [x - its first x, y]
+
+    def fill(x, y, state, weight):
+        if strip["x"] != x:
+            first, end = x * height, min(x + chunk_size, width) * height
+            bits = np.unpackbits(walls[first // 8:(end + 7) // 8])[first % 8:first % 8 + end - first]
+            strip["x"], strip["walls"] = x, bits.reshape(-1, height)
+        part = strip["walls"][:, y:y + chunk_size]
+        state[:part.shape[0], :part.shape[1]] = np.where(part, WALL, PATH)
+        if weights is not None:
+            weight[:part.shape[0], :part.shape[1]] = weights[x:x + chunk_size, y:y + chunk_size]
+
+    create_chunked(path, width, height, chunk_size, weights is not None, fill, start, goal)
+
+
+def random_chunked(path, width, height, density, seed=None, chunk_size=256):
+    # A world of random walls like benchmark.random_map, start and goal in opposite corners
+    rng = np.random.default_rng(seed if seed is not None else random.randrange(2 ** 32))
+
+    def fill(x, y, state, weight):
+        state[rng.random(state.shape) < density] = WALL
+        for corner_x, corner_y in ((0, 0), (width - 1, height - 1)):  # start and goal are never walls
+            if x <= corner_x < x + chunk_size and y <= corner_y < y + chunk_size:
+                state[corner_x - x, corner_y - y] = PATH
+
+    create_chunked(path, width, height, chunk_size, False, fill, (0, 0), (width - 1, height - 1))
+
+
+class ChunkedGrid:
+    # memory_budget is in bytes, at least one chunk is always kept. writable=True allows set_state/set_weight, edited
+    # chunks are written back when they leave the cache and on flush()/close()
+    def __init__(self, path, memory_budget=256 * 2 ** 20, writable=False):
+        self.path = path
+        self.file = open(path, "r+b" if writable else "rb")
+        data = self.file.read(HEADER.size)
+        if len(data) < HEADER.size or data[:8] != MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a chunked grid file")
+        magic, version, width, height, chunk_size, flags, start_x, start_y, goal_x, goal_y, min_weight = \
+            HEADER.unpack(data)
+        if version != VERSION:
+            self.file.close()
+            raise ValueError(f"{path} is chunked grid format version {version}, only {VERSION} can be read")
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.has_weights = bool(flags & HAS_WEIGHTS)
+        self.start = (start_x, start_y) if start_x >= 0 else None
+        self.goal = (goal_x, goal_y) if goal_x >= 0 else None
+        self.min_weight = min_weight
+        self.header_dirty = False
+        self.writable = writable
+        self.chunk_rows = -(-height // chunk_size)
+        self.chunk_area = chunk_size * chunk_size
+        self.chunk_bytes = self.chunk_area * (5 if self.has_weights else 1)
+        self.capacity = max(memory_budget // self.chunk_bytes, 1)  # chunks kept in memory
+        self.chunks = OrderedDict()  # chunk number -> Chunk, least recently used first
+        self.last = (-1, None)  # the most recently used chunk, looked up without touching the OrderedDict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+    def __repr__(self):
+        return f"ChunkedGrid {self.width}x{self.height} ({self.chunk_size} tile chunks)"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+        self.chunks.clear()
+        self.last = (-1, None)
+
+    def get_chunk(self, number):  # number is chunk x * chunk_rows + chunk y
+        if self.last[0] == number:
+            self.hits += 1
+            return self.last[1]
+        chunk = self.chunks.get(number)
+        if chunk is not None:
+            self.hits += 1
+            self.chunks.move_to_end(number)
+        else:
+            self.misses += 1
+            if len(self.chunks) >= self.capacity:
+                old_number, old_chunk = self.chunks.popitem(last=False)
+                self.evictions += 1
+                if old_chunk.dirty:
+                    self._write(old_number, old_chunk)
+            data = bytearray(self.chunk_bytes)
+            self.file.seek(CHUNKS_OFFSET + number * self.chunk_bytes)
+            self.file.readinto(data)
+            chunk = self.chunks[number] = Chunk(data, self.chunk_area, self.has_weights)
+        self.last = (number, chunk)
+        return chunk
+
+    def _write(self, number, chunk):
+        self.file.seek(CHUNKS_OFFSET + number * self.chunk_bytes)
+        self.file.write(chunk.data)
+        chunk.dirty = False
+        self.writes += 1
+
+    def flush(self):  # writes the edited chunks (and a lowered cheapest weight) back to the file
+        for number, chunk in self.chunks.items():
+            if chunk.dirty:
+                self._write(number, chunk)
+        if self.header_dirty:
+            start_x, start_y = self.start if self.start is not None else (-1, -1)
+            goal_x, goal_y = self.goal if self.goal is not None else (-1, -1)
+            self.file.seek(0)
+            self.file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.chunk_size, HAS_WEIGHTS,
+                                        start_x, start_y, goal_x, goal_y, self.min_weight))
+            self.header_dirty = False
+        self.file.flush()
+
+    def cache_stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "writes": self.writes, "resident_chunks": len(self.chunks),
+                "capacity_chunks": self.capacity, "resident_bytes": len(self.chunks) * self.chunk_bytes}
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.writes = 0
+
+    def locate(self, x, y):  # (chunk, index of the tile inside it)
+        chunk_size = self.chunk_size
+        chunk = self.get_chunk(x // chunk_size * self.chunk_rows + y // chunk_size)
+        return chunk, x % chunk_size * chunk_size + y % chunk_size
+
+    def within_board(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def walkable(self, x, y):  # False off the board
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        chunk, index = self.locate(x, y)
+        return chunk.state[index] != WALL
+
+    def weight(self, x, y):
+        if not self.has_weights:
+            return 1.0
+        chunk, index = self.locate(x, y)
+        return chunk.weight[index]
+
+    def set_state(self, x, y, state):
+        if not self.writable:
+            raise ValueError(f"{self.path} was opened read only")
+        chunk, index = self.locate(x, y)
+        chunk.state[index] = state
+        chunk.dirty = True
+
+    def set_weight(self, x, y, weight):
+        if not self.has_weights:
+            raise ValueError(f"{self.path} has no weights")
+        if not self.writable:
+            raise ValueError(f"{self.path} was opened read only")
+        chunk, index = self.locate(x, y)
+        chunk.weight[index] = weight
+        chunk.dirty = True
+        if weight < self.min_weight:
+            self.min_weight = float(np.float32(weight))
+            self.header_dirty = True
+
+    def path_cost(self, path):  # like engine.get_path_cost with the world's weights
+        return sum(math.dist(a, b) * self.weight(*b) for a, b in zip(path, path[1:]))
+
+    def neighbors(self, x, y):
+        # [(x, y, move length, weight)] of the allowed moves out of x, y, with the Grid's diagonal rule. A tile away
+        # from its chunk's edges reads all its neighbors from that one chunk
+        chunk_size = self.chunk_size
+        local_x, local_y = x % chunk_size, y % chunk_size
+        if 0 < local_x < chunk_size - 1 and 0 < local_y < chunk_size - 1:
+            chunk, index = self.locate(x, y)
+            state, weight = chunk.state, chunk.weight
+            around = [(state[index + dx * chunk_size + dy] != WALL,
+                       weight[index + dx * chunk_size + dy] if weight is not None else 1.0) for dx, dy in directions]
+        else:
+            around = [(self.walkable(x + dx, y + dy), self.weight(x + dx, y + dy)
+                       if self.has_weights and self.walkable(x + dx, y + dy) else 1.0) for dx, dy in directions]
+        moves = []
+        for direction, (dx, dy) in enumerate(directions):
+            open_tile, weight = around[direction]
+            if not open_tile:
+                continue
+            sides = diagonal_checks[direction]
+            if sides is not None and not (around[sides[0]][0] or around[sides[1]][0]):
+                continue
+            moves.append((x + dx, y + dy, move_lengths[direction], weight))
+        return moves
+
+
+def a_star_steps(world, start, goal, heuristic=octile):
+    # A* on a ChunkedGrid, stepped like engine.a_star_steps: yields (x * height + y, OPEN/CLOSED) and returns the path
+    # coords (None when there is none). The g scores and parents are dicts over the tiles it reaches, the chunks are
+    # paged in as the frontier gets to them. heuristic=zero gives Dijkstra.
+    # There are no components to tell up front that the goal can't be reached, labeling them would read the whole
+    # world. Only a goal with no moves out of it (walled in on its own) is caught here, from the chunks around it; any
+    # other unreachable goal costs exhausting everything the start reaches, paging in every chunk of it
+    height = world.height
+    goal_x, goal_y = goal
+    start_index = start[0] * height + start[1]
+    goal_index = goal_x * height + goal_y
+    if not (world.walkable(*start) and world.walkable(*goal)):
+        return None
+    if start_index != goal_index and not world.neighbors(goal_x, goal_y):
+        return None
+    heuristic_scale = world.min_weight
+    g = {start_index: 0.0}
+    parent = {start_index: -1}
+    closed = set()
+    open_queue = PriorityQueue()
+    open_queue.insert(start_index, heuristic_scale * heuristic(abs(start[0] - goal_x), abs(start[1] - goal_y)))
+
+    while not open_queue.is_empty():
+        current = open_queue.remove()
+        if current == goal_index:
+            path = []
+            while current != -1:
+                path.append(divmod(current, height))
+                current = parent[current]
+            return path[::-1]
+        closed.add(current)
+        if current != start_index:
+            yield current, CLOSED
+
+        x, y = divmod(current, height)
+        for neighbor_x, neighbor_y, length, weight in world.neighbors(x, y):
+            neighbor = neighbor_x * height + neighbor_y
+            if neighbor in closed:
+                continue
+            new_g = g[current] + length * weight
+            if new_g < g.get(neighbor, np.inf):
+                g[neighbor] = new_g
+                parent[neighbor] = current
+                queued = neighbor in open_queue
+                estimate = heuristic_scale * heuristic(abs(neighbor_x - goal_x), abs(neighbor_y - goal_y))
+                open_queue.insert(neighbor, new_g + estimate)
+                if not queued and neighbor != goal_index:
+                    yield neighbor, OPEN
+    return None
@@ -0,0 +1,171 @@
+# Command line entry point, python -m pathtraverse <command>. Everything but visualize runs headless and without
+# pygame:
+#   python -m pathtraverse solve --search JPS --size 1000 --density .3
+#   python -m pathtraverse solve --board board.grid --search "A*" --heuristic manhattan
+#   python -m pathtraverse generate --maze Prim --size 501 --seed 3 --output maze.grid
+#   python -m pathtraverse world --size 50000 --density .2 --output world.chunks
+#   python -m pathtraverse solve --chunked world.chunks --memory 64
+#   python -m pathtraverse benchmark --sizes 100 500 --json results.json
+#   python -m pathtraverse visualize --width 200 --height 120 --display 1000
+import argparse
+import time
+from .benchmark import SearchCounter, random_map, maze_map
+from . import chunked
+from .engine import get_path_cost, heuristic_searches, run_search, searches_by_name
+from .grid_io import save_grid, load_grid
+from .heuristics import heuristics_by_name
+from .maze_generators import mazes_by_name
+
+
+def backend_version(function, backend):  # accel is only imported (and Numba with it) for the numba backend
+    if backend != "numba":
+        return function
+    from . import accel
+    if not accel.available:
+        raise SystemExit("the numba backend needs numba (pip install numba)")
+    accel.warm_up()
+    return accel.accelerated(function)
+
+
+def solve(options):
+    if options.chunked:
+        return solve_chunked(options)
+    if options.board:
+        grid, start, goal = load_grid(options.board)
+        if start is None or goal is None:
+            raise SystemExit(f"{options.board} has no start/goal saved")
+    elif options.maze:
+        grid, start, goal = maze_map(options.size, options.maze, options.seed)
+    else:
+        grid, start, goal = random_map(options.size, options.density, options.seed)
+    steps = searches_by_name[options.search]
+    search_options = {"heuristic": heuristics_by_name[options.heuristic]} if steps in heuristic_searches else {}
+    steps = backend_version(steps, options.backend)
+    counter = SearchCounter()
+    began = time.perf_counter()
+    path = run_search(steps(grid, start, goal, **search_options), counter)
+    elapsed = time.perf_counter() - began
+    if path is None:
+        print(f"{options.search} on {grid}: no path from {start} to {goal} ({counter.expanded} tiles expanded, "
+              f"{elapsed:.4f}s)")
+        return 1
+    print(f"{options.search} on {grid}: {start} to {goal} costs {get_path_cost(path, grid):.2f} over "
+          f"{len(path)} tiles ({counter.expanded} tiles expanded, {elapsed:.4f}s)")
+    if options.output:
+        with open(options.output, "w") as file:
+            file.write("".join(f"{x} {y}\n" for x, y in path))
+        print(f"Saved the path to {options.output}")
+    return 0
+
+
+def solve_chunked(options):  # A* paging the world's chunks in within --memory MB
+    with chunked.ChunkedGrid(options.chunked, int(options.memory * 2 ** 20)) as world:
+        if world.start is None or world.goal is None:
+            raise SystemExit(f"{options.chunked} has no start/goal saved")
+        counter = SearchCounter()
+        began = time.perf_counter()
+        path = run_search(chunked.a_star_steps(world, world.start, world.goal, heuristics_by_name[options.heuristic]),
+                          counter)
+        elapsed = time.perf_counter() - began
+        stats = world.cache_stats()
+        cache = (f"chunk cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+                 f"{stats['evictions']} evictions, {stats['capacity_chunks']} chunks of {world.chunk_bytes} bytes "
+                 f"fit in the budget")
+        if path is None:
+            print(f"A* on {world}: no path from {world.start} to {world.goal} ({counter.expanded} tiles expanded, "
+                  f"{elapsed:.4f}s)\n{cache}")
+            return 1
+        print(f"A* on {world}: {world.start} to {world.goal} costs {world.path_cost(path):.2f} over {len(path)} tiles "
+              f"({counter.expanded} tiles expanded, {elapsed:.4f}s)\n{cache}")
+    if options.output:
+        with open(options.output, "w") as file:
+            file.write("".join(f"{x} {y}\n" for x, y in path))
+        print(f"Saved the path to {options.output}")
+    return 0
+
+
+def world(options):  # a chunked world of random walls, or a saved board cut into chunks
+    began = time.perf_counter()
+    if options.board:
+        chunked.board_chunked(options.board, options.output, options.chunk_size)
+    else:
+        chunked.random_chunked(options.output, options.size, options.size, options.density, options.seed,
+                               options.chunk_size)
+    print(f"Saved a chunked world to {options.output} in {time.perf_counter() - began:.2f}s")
+    return 0
+
+
+def generate(options):
+    maze = backend_version(mazes_by_name[options.maze], options.backend)
+    began = time.perf_counter()
+    grid, start, goal = maze_map(options.size, options.maze, options.seed, maze)
+    print(f"{options.maze} maze on {grid} in {time.perf_counter() - began:.4f}s")
+    if options.output:
+        save_grid(grid, options.output, start, goal)
+        print(f"Saved the maze to {options.output}, start {start} and goal {goal}")
+    return 0
+
+
+def benchmark(options):
+    from .benchmark import main
+    return main(options.arguments)
+
+
+def visualize(options):
+    from .visualize import visualize
+    visualize(options.width, options.height, options.display, options.weights)
+    return 0
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="pathtraverse", description="Grid pathfinding and maze generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = commands.add_parser("solve", help="run one search and print its path cost")
+    solve_parser.add_argument("--search", default="A*", choices=list(searches_by_name))
+    solve_parser.add_argument("--heuristic", default="octile", choices=list(heuristics_by_name))
+    solve_parser.add_argument("--board", help="a saved board (F2 in the visualizer) with its start and goal")
+    solve_parser.add_argument("--size", type=int, default=100, help="size of the generated square grid")
+    solve_parser.add_argument("--maze", choices=list(mazes_by_name), help="search a maze instead of random walls")
+    solve_parser.add_argument("--density", type=float, default=.2, help="random wall density")
+    solve_parser.add_argument("--seed", type=int, default=0)
+    solve_parser.add_argument("--output", help="write the path to this file, one x y per line")
+    solve_parser.add_argument("--chunked", help="run A* on a chunked world (see world) from its start to its goal")
+    solve_parser.add_argument("--memory", type=float, default=256, help="MB of chunks kept in memory with --chunked")
+    solve_parser.set_defaults(run=solve)
+
+    generate_parser = commands.add_parser("generate", help="generate a maze and save it as a board")
+    generate_parser.add_argument("--maze", default="Iterative", choices=list(mazes_by_name))
+    generate_parser.add_argument("--size", type=int, default=101)
+    generate_parser.add_argument("--seed", type=int)
+    generate_parser.add_argument("--output", help="save the board here (grid_io format, F3 loads board.grid)")
+    generate_parser.set_defaults(run=generate)
+    for command_parser in (solve_parser, generate_parser):
+        command_parser.add_argument("--backend", default="python", choices=["python", "numba"],
+                                    help="numba runs A*, Dijkstra, BFS and the Iterative maze compiled (accel.py)")
+
+    world_parser = commands.add_parser("world", help="write a chunked world that searches load a chunk at a time")
+    world_parser.add_argument("--output", required=True)
+    world_parser.add_argument("--board", help="cut this saved board into chunks instead of making random walls")
+    world_parser.add_argument("--size", type=int, default=10000)
+    world_parser.add_argument("--density", type=float, default=.2, help="random wall density")
+    world_parser.add_argument("--seed", type=int)
+    world_parser.add_argument("--chunk-size", type=int, default=256, help="chunk side in tiles")
+    world_parser.set_defaults(run=world)
+
+    # the benchmark's own options are passed on to benchmark.main
+    benchmark_parser = commands.add_parser("benchmark", help="time the searches and mazes, see benchmark --help",
+                                           add_help=False)
+    benchmark_parser.set_defaults(run=benchmark)
+
+    visualize_parser = commands.add_parser("visualize", help="open the pygame visualizer")
+    visualize_parser.add_argument("--width", type=int, default=100, help="board width in tiles")
+    visualize_parser.add_argument("--height", type=int, default=100, help="board height in tiles")
+    visualize_parser.add_argument("--display", type=int, default=800, help="window size in pixels (longest side)")
+    visualize_parser.add_argument("--weights", help="weights file loaded with l (weights.npy)")
+    visualize_parser.set_defaults(run=visualize)
+
+    options, options.arguments = parser.parse_known_args(arguments)
+    if options.arguments and options.command != "benchmark":
+        parser.error(f"unrecognized arguments: {' '.join(options.arguments)}")
+    return options.run(options)
@@ -0,0 +1,182 @@
+# Connected components of the walkable tiles, so a search can tell in O(1) that the goal can't be reached instead of
+# exhausting everything reachable from the start first. A diagonal move needs one of its orthogonal sides free, so it
+# never connects tiles the straight moves don't, and the components are the 4-connected ones.
+# The first labeling is one pass: the runs of walkable tiles in every column are found with NumPy and the runs that
+# touch in neighboring columns are joined with a union-find. After that the labels follow the grid's edits (see
+# Grid.listeners): removing a wall joins the components around it, adding one can only split its component when the
+# tiles around it don't connect to each other, and then searches from each side run in lockstep until all but one
+# have run out, so only the cut off parts are relabeled
+from collections import deque
+import numpy as np
+from .grid import WALL, move_directions
+
+# the 8 tiles around a tile in order around it, so each one touches the next (N, NE, E, SE, S, SW, W, NW)
+ring = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+
+
+def get_components(grid):  # the grid's Components, labeled on first use and kept up to date from then on
+    if grid.components is None:
+        grid.components = Components(grid)
+    return grid.components
+
+
+class Components:
+    def __init__(self, grid):
+        self.grid = grid
+        self.labels = None  # component id of every tile (flat), -1 for walls. None when it needs a full labeling
+        # union-find over the component ids: removing a wall merges ids instead of relabeling their tiles
+        self.parent = []
+        grid.listeners.append(self.tile_changed)
+
+    def close(self):  # stops following the grid's edits
+        if self.tile_changed in self.grid.listeners:
+            self.grid.listeners.remove(self.tile_changed)
+        if self.grid.components is self:
+            self.grid.components = None
+
+    def tile_changed(self, x=None, y=None):
+        if self.labels is None:
+            return
+        if x is None:  # the whole grid changed, labeled again when needed
+            self.labels = None
+            return
+        index = self.grid.index(x, y)
+        is_wall = self.grid.state[x, y] == WALL
+        if is_wall and self.labels[index] != -1:
+            self._add_wall(index)
+        elif not is_wall and self.labels[index] == -1:
+            self._remove_wall(index)
+
+    def label(self):
+        grid = self.grid
+        height = grid.height
+        walkable = grid.state.reshape(-1) != WALL
+        # a run starts on every walkable tile whose tile above is a wall or in another column
+        run_starts = walkable.copy()
+        run_starts[1:] &= ~walkable[:-1]
+        run_starts[::height] = walkable[::height]
+        run = np.cumsum(run_starts) - 1  # run number of every walkable tile
+        run_count = int(run[-1]) + 1 if run.size else 0
+
+        # pairs of runs in neighboring columns with tiles side by side. The tiles two runs share are consecutive, so
+        # the duplicate pairs are next to each other
+        beside = walkable[:-height] & walkable[height:]
+        left, right = run[:-height][beside], run[height:][beside]
+        keep = np.ones(left.size, bool)
+        keep[1:] = (left[1:] != left[:-1]) | (right[1:] != right[:-1])
+        run_parent = list(range(run_count))
+        for left_run, right_run in zip(left[keep].tolist(), right[keep].tolist()):
+            left_root, right_root = _find(run_parent, left_run), _find(run_parent, right_run)
+            if left_root != right_root:
+                run_parent[max(left_root, right_root)] = min(left_root, right_root)
+        roots = np.array([_find(run_parent, run_number) for run_number in range(run_count)], np.int64)
+        _, component_of_run = np.unique(roots, return_inverse=True)
+
+        labels = np.full(walkable.size, -1, np.int32)
+        labels[walkable] = component_of_run.reshape(-1)[run[walkable]]
+        self.labels = labels
+        self.parent = list(range(int(component_of_run.max()) + 1 if run_count else 0))
+
+    def component(self, coord):  # id of the component of a tile, -1 for a wall
+        if self.labels is None:
+            self.label()
+        label = int(self.labels[self.grid.index(*coord)])
+        return -1 if label == -1 else _find(self.parent, label)
+
+    def connected(self, start, goal):
+        start_component = self.component(start)
+        return start_component != -1 and start_component == self.component(goal)
+
+    def _remove_wall(self, index):  # joins the components around the tile
+        labels = self.labels
+        roots = {_find(self.parent, int(labels[index + offset])) for offset in self._orthogonal_offsets(index)
+                 if labels[index + offset] != -1}
+        if not roots:
+            self.parent.append(len(self.parent))
+            labels[index] = len(self.parent) - 1
+            return
+        root = roots.pop()
+        for other in roots:
+            self.parent[other] = root
+        labels[index] = root
+
+    def _add_wall(self, index):
+        labels = self.labels
+        labels[index] = -1
+        seeds = self._split_seeds(index)
+        if len(seeds) < 2:
+            return
+        # Lockstep searches from the seeds. Searches that meet are one side (merged in side_parent), a side whose
+        # searches have all run out is everything that is left of a cut off component
+        grid = self.grid
+        moves = grid.moves.reshape(-1)
+        offsets = grid.offsets
+        owner = {seed: number for number, seed in enumerate(seeds)}
+        side_parent = list(range(len(seeds)))
+        frontiers = [deque([seed]) for seed in seeds]
+        visited = [[seed] for seed in seeds]
+
+        def active_sides():
+            return {_find(side_parent, number) for number, frontier in enumerate(frontiers) if frontier}
+
+        sides = active_sides()
+        while len(sides) > 1:
+            for number, frontier in enumerate(frontiers):
+                if not frontier:
+                    continue
+                current = frontier.popleft()
+                for direction in move_directions[moves[current] & 15]:
+                    neighbor = current + offsets[direction]
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = number
+                        visited[number].append(neighbor)
+                        frontier.append(neighbor)
+                    else:
+                        side, other_side = _find(side_parent, number), _find(side_parent, other)
+                        if side != other_side:
+                            side_parent[max(side, other_side)] = min(side, other_side)
+            sides = active_sides()
+
+        # every side that ran out is a component of its own now, the side still searching keeps the old id
+        finished = {_find(side_parent, number) for number in range(len(seeds))} - sides
+        if not sides:
+            finished.pop()
+        for side in finished:
+            self.parent.append(len(self.parent))
+            new_label = len(self.parent) - 1
+            for number in range(len(seeds)):
+                if _find(side_parent, number) == side:
+                    labels[visited[number]] = new_label
+
+    def _split_seeds(self, index):
+        # One walkable straight neighbor from every arc of walkable tiles around a new wall. Tiles in the same arc are
+        # still connected around it, so only two or more arcs can mean the component was cut
+        grid = self.grid
+        x, y = grid.coord(index)
+        walkable = [grid.within_board(x + dx, y + dy) and grid.state[x + dx, y + dy] != WALL for dx, dy in ring]
+        if all(walkable):
+            return []
+        first = walkable.index(False)
+        seeds = []
+        seeded = False  # the current arc has a seed already
+        for position in range(first + 1, first + 9):
+            position %= 8
+            if not walkable[position]:
+                seeded = False
+                continue
+            if position % 2 == 0 and not seeded:  # even ring positions are the straight neighbors
+                dx, dy = ring[position]
+                seeds.append(grid.index(x + dx, y + dy))
+                seeded = True
+        return seeds
+
+    def _orthogonal_offsets(self, index):
+        return [self.grid.offsets[direction] for direction in move_directions[self.grid.moves.reshape(-1)[index] & 15]]
+
+
+def _find(parent, item):  # union-find root with path halving
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
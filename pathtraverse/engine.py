@@ -0,0 +1,521 @@
+# Headless path searches. They work directly on the Grid arrays and are written as generators that yield an
+# (index, state) event for every tile they mark, so a front end can play them a few steps at a time, pause them or
+# record them. The plain *_search functions just run the generator to the end and pass the events to on_visit
+import math
+from collections import deque
+import numpy as np
+from .grid import OPEN, CLOSED, directions, move_directions, move_lengths
+from .components import get_components
+from .fields import flow_field_steps
+from .heuristics import octile, get_heuristic
+from .hierarchical import hierarchical_steps
+from .incremental import d_star_lite_steps
+from .tile_queues import PriorityQueue, BucketQueue, counted
+from .wall_bits import get_wall_bits, pruned_steps, jump
+
+
+def within_board(grid, x, y):  # checks if coords are in board
+    return grid.within_board(x, y)
+
+
+def walkable(grid, x, y):  # checks if its a wall
+    return grid.walkable(x, y)
+
+
+def get_neighbor_coords(grid, x, y, corners=True, distance=1, around=False, outside=False):
+    # if around variable is true, walls can now be selected
+    # if outside variable is true, the coordinates can now be out of bounds
+
+    # gets all valid neighboring coordinates including diagonals coords
+    # Order is N, E, S, W, NE, SE, SW, NW
+    neighbor_coords = [
+        (x, y - distance),
+        (x + distance, y),
+        (x, y + distance),
+        (x - distance, y)
+    ]
+
+    neighbor_coords = [neighbor for neighbor in neighbor_coords if
+                       (outside or within_board(grid, *neighbor))
+                       and (around or walkable(grid, *neighbor))]
+
+    if not corners:
+        return neighbor_coords
+
+    diagonals_coords = [
+        (x + distance, y - distance),
+        (x + distance, y + distance),
+        (x - distance, y + distance),
+        (x - distance, y - distance)
+    ]
+
+    diagonals_coords = [diagonal for diagonal in diagonals_coords if
+                        (outside or within_board(grid, *diagonal))
+                        and (around or walkable(grid, *diagonal))
+                        and (around or outside
+                             or ((diagonal[0], y) in neighbor_coords or (x, diagonal[1]) in neighbor_coords))]
+
+    neighbor_coords += diagonals_coords
+    return neighbor_coords
+
+
+def get_distance(coord1, coord2):  # Euclidean distance between two points
+    return ((coord1[0] - coord2[0]) ** 2 + (coord1[1] - coord2[1]) ** 2) ** .5
+
+
+def get_path_cost(path, grid=None):  # length of a path of neighboring coords, weighted by the grid's tiles if given
+    if grid is None:
+        return sum(get_distance(path[index], path[index + 1]) for index in range(len(path) - 1))
+    return sum(get_distance(path[index], path[index + 1]) * float(grid.weight[path[index + 1]])
+               for index in range(len(path) - 1))
+
+
+def get_search_weights(grid):
+    # flat float64 copy of the weights (so costs add up exactly like get_path_cost) and the cheapest weight, which
+    # scales the heuristics so they stay admissible on weighted terrain
+    return grid.weight.reshape(-1).astype(float), grid.weight_range()[0]
+
+
+def make_dijkstra_queue(grid, max_buckets=64):
+    # A bucket queue whose buckets are one cheapest move wide (Dial's algorithm) beats the binary heap whenever the
+    # weights are close enough together that only a few buckets are needed
+    min_weight, max_weight = grid.weight_range()
+    bucket_count = math.ceil(max(move_lengths) * max_weight / min_weight) + 1
+    if bucket_count <= max_buckets:
+        return BucketQueue(min_weight, bucket_count)
+    return PriorityQueue()
+
+
+# Every search takes the grid, start coord and goal coord and returns the path from start to goal (None if there is
+# no path). The searched tiles are marked OPEN/CLOSED in grid.state (start/goal excluded) and the *_steps generators
+# yield the flat index and state of every marked tile, returning the path when they stop. The *_steps that use a
+# queue take stats=None, an instrument.SearchStats their queues count into (see tile_queues.counted)
+# g: Cost from the start tile (grid.g). A move costs its length times the weight of the tile it ends on
+# h: Heuristic score (estimated distance to the goal, computed lazily for the tiles a search reaches. See heuristics.py)
+# f: F score for A* search (h+g, grid.f)
+
+
+def unreachable(grid, start, goal):  # O(1) once the grid's connected components are labeled
+    return not get_components(grid).connected(start, goal)
+
+
+def run_search(steps, on_visit=None):  # runs a search generator to the end and returns its path
+    while True:
+        try:
+            index, state = next(steps)
+        except StopIteration as stop:
+            return stop.value
+        if on_visit:
+            on_visit(index, state)
+
+
+def a_star_search(grid, start, goal, on_visit=None, heuristic=octile):
+    return run_search(a_star_steps(grid, start, goal, heuristic), on_visit)
+
+
+def dijkstra_search(grid, start, goal, on_visit=None):
+    return run_search(dijkstra_steps(grid, start, goal), on_visit)
+
+
+def greedy_first_search(grid, start, goal, on_visit=None, heuristic=octile):
+    return run_search(greedy_first_steps(grid, start, goal, heuristic), on_visit)
+
+
+def breadth_first_search(grid, start, goal, on_visit=None):
+    return run_search(breadth_first_steps(grid, start, goal), on_visit)
+
+
+def depth_first_search(grid, start, goal, on_visit=None):
+    return run_search(depth_first_steps(grid, start, goal), on_visit)
+
+
+def jump_point_search(grid, start, goal, on_visit=None, heuristic=octile):
+    return run_search(jump_point_steps(grid, start, goal, heuristic), on_visit)
+
+
+def bidirectional_a_star_search(grid, start, goal, on_visit=None, heuristic=octile):
+    return run_search(bidirectional_a_star_steps(grid, start, goal, heuristic), on_visit)
+
+
+def bidirectional_breadth_first_search(grid, start, goal, on_visit=None):
+    return run_search(bidirectional_breadth_first_steps(grid, start, goal), on_visit)
+
+
+def d_star_lite_search(grid, start, goal, on_visit=None, heuristic=octile):
+    return run_search(d_star_lite_steps(grid, start, goal, heuristic), on_visit)
+
+
+def hierarchical_search(grid, start, goal, on_visit=None, heuristic=octile):
+    return run_search(hierarchical_steps(grid, start, goal, heuristic), on_visit)
+
+
+def flow_field_search(grid, start, goal, on_visit=None):
+    return run_search(flow_field_steps(grid, start, goal), on_visit)
+
+
+def a_star_steps(grid, start, goal, heuristic=octile, stats=None):
+    return _best_first_steps(grid, start, goal, heuristic, stats)
+
+
+def dijkstra_steps(grid, start, goal, stats=None):
+    return _best_first_steps(grid, start, goal, None, stats)
+
+
+def _best_first_steps(grid, start, goal, heuristic, stats=None):
+    grid.clear_search()
+    if unreachable(grid, start, goal):
+        return None
+    state = grid.state.reshape(-1)
+    g = grid.g.reshape(-1)
+    f = grid.f.reshape(-1)
+    parent = grid.parent.reshape(-1)
+    moves = grid.moves.reshape(-1)
+    offsets = grid.offsets
+    height = grid.height
+    goal_x, goal_y = goal
+    start_index = grid.index(*start)
+    goal_index = grid.index(*goal)
+    weight, heuristic_scale = get_search_weights(grid)
+
+    g[start_index] = 0
+    f[start_index] = heuristic_scale * get_heuristic(heuristic, start, goal) if heuristic else 0
+    open_queue = counted(PriorityQueue() if heuristic else make_dijkstra_queue(grid), stats)
+    open_queue.insert(start_index, f[start_index])
+
+    while not open_queue.is_empty():
+        current = open_queue.remove()
+        if current == goal_index:
+            return grid.get_path(goal_index)
+
+        if current != start_index:
+            state[current] = CLOSED
+            yield current, CLOSED
+
+        for direction in move_directions[moves[current]]:
+            neighbor = current + offsets[direction]
+            if state[neighbor] == CLOSED or neighbor == start_index:
+                continue
+
+            new_g = g[current] + move_lengths[direction] * weight[neighbor]
+            # only keep the route through the current tile if it is closer than the tile's old parent
+            if new_g < g[neighbor]:
+                g[neighbor] = new_g
+                parent[neighbor] = current
+                f[neighbor] = new_g
+                if heuristic:
+                    x, y = divmod(neighbor, height)
+                    f[neighbor] += heuristic_scale * heuristic(abs(x - goal_x), abs(y - goal_y))
+                queued = neighbor in open_queue
+                open_queue.insert(neighbor, f[neighbor])
+                if not queued and neighbor != goal_index:
+                    state[neighbor] = OPEN
+                    yield neighbor, OPEN
+
+
+def greedy_first_steps(grid, start, goal, heuristic=octile, stats=None):
+    return _first_visit_steps(grid, start, goal, "greedy", heuristic, stats)
+
+
+def breadth_first_steps(grid, start, goal):
+    return _first_visit_steps(grid, start, goal, "breadth")
+
+
+def depth_first_steps(grid, start, goal):
+    return _first_visit_steps(grid, start, goal, "depth")
+
+
+def _first_visit_steps(grid, start, goal, order, heuristic=None, stats=None):
+    # Greedy, BFS and DFS never revisit a tile, so they stop as soon as the goal is first seen
+    grid.clear_search()
+    if tuple(start) == tuple(goal):  # the goal is never "seen" from a neighbor then
+        return [start]
+    if unreachable(grid, start, goal):
+        return None
+    state = grid.state.reshape(-1)
+    parent = grid.parent.reshape(-1)
+    moves = grid.moves.reshape(-1)
+    offsets = grid.offsets
+    # Greedy moves diagonally, BFS/DFS only use the 4 straight moves
+    corner_mask = 255 if order == "greedy" else 15
+    height = grid.height
+    goal_x, goal_y = goal
+    start_index = grid.index(*start)
+    goal_index = grid.index(*goal)
+
+    if order == "greedy":
+        open_queue = counted(PriorityQueue(), stats)
+        open_queue.insert(start_index, get_heuristic(heuristic, start, goal))
+        pop = open_queue.remove
+    elif order == "breadth":
+        open_queue = deque([start_index])
+        pop = open_queue.popleft
+    else:
+        open_queue = [start_index]
+        pop = open_queue.pop
+
+    while len(open_queue) != 0:
+        current = pop()
+        if current != start_index:
+            state[current] = CLOSED
+            yield current, CLOSED
+
+        neighbor_directions = move_directions[moves[current] & corner_mask]
+        if order == "depth":
+            neighbor_directions = reversed(neighbor_directions)
+        for direction in neighbor_directions:
+            neighbor = current + offsets[direction]
+            if parent[neighbor] == -1 and neighbor != start_index:
+                parent[neighbor] = current
+                if neighbor == goal_index:
+                    return grid.get_path(goal_index)
+                if order == "greedy":
+                    x, y = divmod(neighbor, height)
+                    open_queue.insert(neighbor, heuristic(abs(x - goal_x), abs(y - goal_y)))
+                else:
+                    open_queue.append(neighbor)
+                state[neighbor] = OPEN
+                yield neighbor, OPEN
+
+
+def jump_point_steps(grid, start, goal, heuristic=octile, stats=None):
+    # A* over jump points for uniform-cost 8-connected grids. Straight and diagonal runs are skipped until a tile with a
+    # forced neighbor (a wall ends next to the run) so only the tiles where paths can branch are queued.
+    # The scans run on the grid's bit-packed walls (wall_bits.py), 64 tiles per word along a straight run. The
+    # skipping is only valid when every tile costs the same, weighted grids fall back to plain A*
+    min_weight, max_weight = grid.weight_range()
+    if min_weight != max_weight:
+        return (yield from a_star_steps(grid, start, goal, heuristic, stats))
+    grid.clear_search()
+    if unreachable(grid, start, goal):
+        return None
+    wall_bits = get_wall_bits(grid)
+    state = grid.state.reshape(-1)
+    g = grid.g.reshape(-1)
+    f = grid.f.reshape(-1)
+    parent = grid.parent.reshape(-1)
+    moves = grid.moves.reshape(-1)
+    height = grid.height
+    goal_x, goal_y = goal
+    start_index = grid.index(*start)
+    goal_index = grid.index(*goal)
+    goal_padded = (goal_x + 1, goal_y + 1)
+
+    g[start_index] = 0
+    f[start_index] = min_weight * get_heuristic(heuristic, start, goal)
+    open_queue = counted(PriorityQueue(), stats)
+    open_queue.insert(start_index, f[start_index])
+
+    while not open_queue.is_empty():
+        current = open_queue.remove()
+        if current == goal_index:
+            _fill_jump_parents(grid, goal_index)
+            return grid.get_path(goal_index)
+
+        if current != start_index:
+            state[current] = CLOSED
+            yield current, CLOSED
+
+        x, y = divmod(current, height)
+        if current == start_index:
+            neighbor_steps = [directions[direction] for direction in move_directions[moves[current]]]
+        else:
+            parent_x, parent_y = divmod(int(parent[current]), height)
+            neighbor_steps = pruned_steps(wall_bits, x + 1, y + 1, _sign(x - parent_x), _sign(y - parent_y))
+
+        for dx, dy in neighbor_steps:
+            jump_point = jump(wall_bits, x + dx + 1, y + dy + 1, dx, dy, goal_padded)
+            if jump_point is None:
+                continue
+            jump_x = jump_point[0] - 1
+            jump_y = jump_point[1] - 1
+            neighbor = jump_x * height + jump_y
+            if state[neighbor] == CLOSED or neighbor == start_index:
+                continue
+
+            new_g = g[current] + min_weight * octile(abs(jump_x - x), abs(jump_y - y))
+            if new_g < g[neighbor]:
+                g[neighbor] = new_g
+                parent[neighbor] = current
+                f[neighbor] = new_g + min_weight * heuristic(abs(jump_x - goal_x), abs(jump_y - goal_y))
+                queued = neighbor in open_queue
+                open_queue.insert(neighbor, f[neighbor])
+                if not queued and neighbor != goal_index:
+                    state[neighbor] = OPEN
+                    yield neighbor, OPEN
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def _fill_jump_parents(grid, goal_index):  # fills in the tiles between jump points so the parent chain is tile by tile
+    parent = grid.parent.reshape(-1)
+    height = grid.height
+    current = goal_index
+    while parent[current] != -1:
+        jump_parent = int(parent[current])
+        x, y = divmod(current, height)
+        parent_x, parent_y = divmod(jump_parent, height)
+        dx, dy = _sign(parent_x - x), _sign(parent_y - y)
+        while (x, y) != (parent_x, parent_y):
+            parent[x * height + y] = (x + dx) * height + y + dy
+            x += dx
+            y += dy
+        current = jump_parent
+
+
+def bidirectional_a_star_steps(grid, start, goal, heuristic=octile, stats=None):
+    # Runs A* forward from the start and backward from the goal, always expanding the side with the smaller open list.
+    # best_cost is the cheapest start -> goal route seen where the two searches touch. Once it is no more than the
+    # larger of the two smallest f scores, neither search can find anything cheaper so the route is optimal
+    grid.clear_search()
+    size = grid.width * grid.height
+    state = grid.state.reshape(-1)
+    moves = grid.moves.reshape(-1)
+    offsets = grid.offsets
+    height = grid.height
+    start_index = grid.index(*start)
+    goal_index = grid.index(*goal)
+    if start_index == goal_index:
+        return [start]
+    if unreachable(grid, start, goal):
+        return None
+
+    # side 0 searches forward into grid.g/grid.parent, side 1 backward into its own arrays. Going backward from current
+    # to neighbor undoes the move neighbor -> current, which costs the weight of current
+    weight, heuristic_scale = get_search_weights(grid)
+    g = [grid.g.reshape(-1), np.full(size, np.inf)]
+    parent = [grid.parent.reshape(-1), np.full(size, -1, np.int32)]
+    targets = [goal, start]
+    closed = np.zeros(size, np.uint8)  # bit 1 closed forward, bit 2 closed backward
+    open_queues = [counted(PriorityQueue(), stats), counted(PriorityQueue(), stats)]
+    for side, index, coord in ((0, start_index, start), (1, goal_index, goal)):
+        g[side][index] = 0
+        open_queues[side].insert(index, heuristic_scale * get_heuristic(heuristic, coord, targets[side]))
+
+    best_cost = np.inf
+    meeting = -1
+    while not open_queues[0].is_empty() and not open_queues[1].is_empty():
+        if best_cost <= max(open_queues[0].peek_priority(), open_queues[1].peek_priority()):
+            break
+
+        side = 0 if len(open_queues[0]) <= len(open_queues[1]) else 1
+        g_side, g_other, parent_side = g[side], g[1 - side], parent[side]
+        target_x, target_y = targets[side]
+        current = open_queues[side].remove()
+        closed[current] |= 1 << side
+        if current != start_index and current != goal_index:
+            state[current] = CLOSED
+            yield current, CLOSED
+
+        for direction in move_directions[moves[current]]:
+            neighbor = current + offsets[direction]
+            if closed[neighbor] >> side & 1:
+                continue
+
+            new_g = g_side[current] + move_lengths[direction] * weight[current if side else neighbor]
+            if new_g < g_side[neighbor]:
+                g_side[neighbor] = new_g
+                parent_side[neighbor] = current
+                x, y = divmod(neighbor, height)
+                queued = neighbor in open_queues[side]
+                open_queues[side].insert(neighbor,
+                                         new_g + heuristic_scale * heuristic(abs(x - target_x), abs(y - target_y)))
+                if not queued and state[neighbor] not in (OPEN, CLOSED) \
+                        and neighbor != start_index and neighbor != goal_index:
+                    state[neighbor] = OPEN
+                    yield neighbor, OPEN
+                if new_g + g_other[neighbor] < best_cost:
+                    best_cost = new_g + g_other[neighbor]
+                    meeting = neighbor
+
+    if meeting != -1:
+        _join_parents(grid, meeting, parent[1])
+        return grid.get_path(goal_index)
+
+
+def bidirectional_breadth_first_steps(grid, start, goal):
+    # BFS from both ends one whole layer at a time, always growing the smaller frontier. The layer where the two
+    # frontiers first touch is finished before stopping so the shortest of the meeting points is used
+    grid.clear_search()
+    size = grid.width * grid.height
+    state = grid.state.reshape(-1)
+    moves = grid.moves.reshape(-1)
+    offsets = grid.offsets
+    start_index = grid.index(*start)
+    goal_index = grid.index(*goal)
+    if start_index == goal_index:
+        return [start]
+    if unreachable(grid, start, goal):
+        return None
+
+    parent = [grid.parent.reshape(-1), np.full(size, -1, np.int32)]
+    depth = [np.full(size, -1, np.int32), np.full(size, -1, np.int32)]
+    depth[0][start_index] = 0
+    depth[1][goal_index] = 0
+    frontiers = [[start_index], [goal_index]]
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        parent_side, depth_side, depth_other = parent[side], depth[side], depth[1 - side]
+        best_length = -1
+        meeting = -1
+        next_frontier = []
+        for current in frontiers[side]:
+            if current != start_index and current != goal_index:
+                state[current] = CLOSED
+                yield current, CLOSED
+
+            for direction in move_directions[moves[current] & 15]:
+                neighbor = current + offsets[direction]
+                if depth_side[neighbor] != -1:
+                    continue
+                depth_side[neighbor] = depth_side[current] + 1
+                parent_side[neighbor] = current
+                if depth_other[neighbor] != -1:
+                    length = depth_side[neighbor] + depth_other[neighbor]
+                    if best_length == -1 or length < best_length:
+                        best_length = length
+                        meeting = neighbor
+                    continue
+                next_frontier.append(neighbor)
+                if state[neighbor] not in (OPEN, CLOSED):
+                    state[neighbor] = OPEN
+                    yield neighbor, OPEN
+
+        if meeting != -1:
+            _join_parents(grid, meeting, parent[1])
+            return grid.get_path(goal_index)
+        frontiers[side] = next_frontier
+
+
+def _join_parents(grid, meeting, parent_backward):
+    # turns the backward search's links (which point toward the goal) into grid.parent links from the meeting tile on,
+    # so walking grid.parent from the goal runs all the way back to the start
+    parent = grid.parent.reshape(-1)
+    current = meeting
+    while parent_backward[current] != -1:
+        next_tile = int(parent_backward[current])
+        parent[next_tile] = current
+        current = next_tile
+
+
+# searches (plain and stepped) that take a heuristic= keyword
+heuristic_searches = [a_star_search, greedy_first_search, jump_point_search, bidirectional_a_star_search,
+                      d_star_lite_search, hierarchical_search, a_star_steps, greedy_first_steps, jump_point_steps,
+                      bidirectional_a_star_steps, d_star_lite_steps, hierarchical_steps]
+
+# every search by its display name, as the stepped generator (run_search turns one into a plain search)
+searches_by_name = {
+    "A*": a_star_steps,
+    "Dijkstra": dijkstra_steps,
+    "Greedy": greedy_first_steps,
+    "DFS": depth_first_steps,
+    "BFS": breadth_first_steps,
+    "JPS": jump_point_steps,
+    "Bidirectional A*": bidirectional_a_star_steps,
+    "Bidirectional BFS": bidirectional_breadth_first_steps,
+    "D* Lite": d_star_lite_steps,
+    "HPA*": hierarchical_steps,
+    "Flow field": flow_field_steps
+}
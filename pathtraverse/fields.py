@@ -0,0 +1,190 @@
+# Distance and flow fields for many agents going to the same goal. A field holds the cost from every tile to the goal,
+# computed once by a reverse Dijkstra from the goal, and the best next move out of every tile, so the path of any agent
+# is a lookup as long as its length. Fields are cached per goal on the grid and dropped by the grid's listeners when
+# walls or weights change.
+# On uniform terrain the Dijkstra is a NumPy wavefront: every move costs at least the weight w, so all tiles whose
+# cost is in [k * w, (k + 1) * w) are final together (Dial's buckets) and are expanded as one batch. Narrow wavefronts
+# (mazes, corridors) leave too few tiles per batch for NumPy to pay off, so the rest is handed to a plain queue
+from collections import OrderedDict
+import numpy as np
+from .components import get_components
+from .grid import directions, move_directions, move_lengths
+from .tile_queues import PriorityQueue, BucketQueue, counted
+
+cached_fields = 8  # fields kept per grid, the least recently used goal is dropped first
+
+
+def get_distance_field(grid, goal, stats=None):  # the goal's field, computed unless it is cached
+    if grid.fields is None:
+        grid.fields = FieldCache(grid)
+    return grid.fields.get(goal, stats)
+
+
+def find_field(grid, goal):  # the goal's field if it is cached, None otherwise (nothing is computed)
+    return grid.fields.fields.get(tuple(goal)) if grid.fields is not None else None
+
+
+def field_paths(grid, starts, goal):  # paths of many agents to one goal, from a single field
+    field = get_distance_field(grid, goal)
+    return [field.path(start) for start in starts]
+
+
+def flow_field_steps(grid, start, goal, stats=None):
+    # For the searches registry: the path looked up in the goal's field, which is computed if it isn't cached. It
+    # yields nothing, the field can be seen as a heatmap instead. What computing the field took is kept on it
+    # (DistanceField.settled/peak_open) for the benchmarks
+    grid.clear_search()
+    if not get_components(grid).connected(start, goal):
+        return None
+    path = get_distance_field(grid, goal, stats).path(start)
+    yield from ()
+    return path
+
+
+class FieldCache:
+    def __init__(self, grid):
+        self.grid = grid
+        self.fields = OrderedDict()  # goal -> DistanceField, most recently used last
+        grid.listeners.append(self.tile_changed)
+
+    def close(self):  # stops following the grid's edits
+        if self.tile_changed in self.grid.listeners:
+            self.grid.listeners.remove(self.tile_changed)
+        if self.grid.fields is self:
+            self.grid.fields = None
+
+    def tile_changed(self, x=None, y=None):  # any wall or weight can change the costs all over the board
+        self.fields.clear()
+
+    def get(self, goal, stats=None):  # stats count the queues of a field that has to be computed
+        goal = tuple(goal)
+        field = self.fields.pop(goal, None)
+        if field is None:
+            field = DistanceField(self.grid, goal, stats)
+            if len(self.fields) >= cached_fields:
+                self.fields.popitem(last=False)
+        self.fields[goal] = field
+        return field
+
+
+class DistanceField:
+    def __init__(self, grid, goal, stats=None):
+        self.grid = grid
+        self.goal = tuple(goal)
+        goal_index = grid.index(*goal)
+        min_weight, max_weight = grid.weight_range()
+        if min_weight == max_weight:
+            distance, peak_open = _wavefront(grid, goal_index, min_weight, stats)
+        else:
+            distance = np.full(grid.width * grid.height, np.inf)
+            distance[goal_index] = 0
+            final = np.zeros(distance.size, bool)
+            queue = counted(PriorityQueue(), stats)
+            queue.insert(goal_index, 0.0)
+            peak_open = _reverse_dijkstra(grid, distance, final, queue)
+        self.distance = distance.reshape(grid.shape)  # cost from every tile to the goal, inf where it can't get there
+        # the tiles the Dijkstra settled (every tile that reaches the goal) and the most it had reached but not settled
+        self.settled = int(np.isfinite(distance).sum())
+        self.peak_open = peak_open
+        self.flow = _flow(grid, self.distance)  # direction of the best move out of every tile, -1 at the goal/walls
+
+    def path(self, start):  # coords from start to the goal following the flow, None when the goal can't be reached
+        grid = self.grid
+        if self.distance[start] == np.inf:
+            return None
+        flow = self.flow.reshape(-1)
+        offsets = grid.offsets
+        goal_index = grid.index(*self.goal)
+        index = grid.index(*start)
+        path = [index]
+        while index != goal_index:
+            index += offsets[flow[index]]
+            path.append(index)
+        return [grid.coord(tile) for tile in path]
+
+
+def _wavefront(grid, goal_index, weight, stats=None):
+    moves = grid.moves.reshape(-1)
+    offsets = grid.offsets
+    distance = np.full(grid.width * grid.height, np.inf)
+    distance[goal_index] = 0
+    final = np.zeros(distance.size, bool)
+    buckets = {0: [np.array([goal_index])]}  # bucket number -> arrays of tiles queued with a cost in it
+    batches = settled = 0
+    reached = peak_open = 1
+    while buckets:
+        bucket = min(buckets)
+        batch = np.unique(np.concatenate(buckets.pop(bucket)))
+        batch = batch[~final[batch]]  # tiles queued again at a lower cost were settled in an earlier bucket
+        if batch.size == 0:
+            continue
+        final[batch] = True
+        batches += 1
+        settled += batch.size
+        for direction, offset in enumerate(offsets):
+            tiles = batch[(moves[batch] >> direction & 1).astype(bool)]
+            neighbors = tiles + offset
+            through = distance[tiles] + move_lengths[direction] * weight
+            old = distance[neighbors]
+            better = through < old
+            neighbors, through = neighbors[better], through[better]
+            if not neighbors.size:
+                continue
+            reached += int(np.count_nonzero(old[better] == np.inf))  # a batch's tiles are unique, so are the neighbors
+            np.minimum.at(distance, neighbors, through)
+            numbers = (through // weight).astype(np.int64)
+            for number in np.unique(numbers):
+                buckets.setdefault(int(number), []).append(neighbors[numbers == number])
+        peak_open = max(peak_open, reached - settled)
+
+        if batches >= 32 and settled < 16 * batches:  # a thin wavefront, finish with a queue
+            queue = counted(BucketQueue(weight, 3), stats)
+            for index in np.flatnonzero((distance < np.inf) & ~final).tolist():
+                queue.insert(index, distance[index])
+            peak_open = max(peak_open, _reverse_dijkstra(grid, distance, final, queue))
+            break
+    return distance, peak_open
+
+
+def _reverse_dijkstra(grid, distance, final, queue):
+    # Dijkstra from the goal towards every tile, carrying on from whatever is already final/queued. Going back over
+    # the move neighbor -> current costs the weight of current. Returns the largest size of the queue
+    moves = grid.moves.reshape(-1)
+    weight = grid.weight.reshape(-1)
+    offsets = grid.offsets
+    peak_open = len(queue)
+    while not queue.is_empty():
+        current = queue.remove()
+        if final[current]:
+            continue
+        final[current] = True
+        current_weight = float(weight[current])
+        for direction in move_directions[moves[current]]:
+            neighbor = current + offsets[direction]
+            if final[neighbor]:
+                continue
+            through = distance[current] + move_lengths[direction] * current_weight
+            if through < distance[neighbor]:
+                distance[neighbor] = through
+                queue.insert(neighbor, through)
+                if len(queue) > peak_open:
+                    peak_open = len(queue)
+    return peak_open
+
+
+def _flow(grid, distance):  # the move out of every tile with the cheapest move cost + distance left
+    width, height = grid.shape
+    padded_distance = np.pad(distance, 1, constant_values=np.inf)
+    padded_weight = np.pad(grid.weight.astype(float), 1)
+    best = np.full(grid.shape, np.inf)
+    flow = np.full(grid.shape, -1, np.int8)
+    for direction, (dx, dy) in enumerate(directions):
+        neighbors = (slice(1 + dx, width + 1 + dx), slice(1 + dy, height + 1 + dy))
+        through = move_lengths[direction] * padded_weight[neighbors] + padded_distance[neighbors]
+        through[(grid.moves >> direction & 1) == 0] = np.inf
+        better = through < best
+        best[better] = through[better]
+        flow[better] = direction
+    flow[distance == 0] = -1
+    flow[distance == np.inf] = -1
+    return flow
@@ -0,0 +1,159 @@
+# Struct-of-arrays grid. Every per-tile value lives in its own NumPy array indexed [x, y] instead of on a Tile
+# object, so resets are single vectorized fills. Searches address tiles by flat index (x * height + y)
+import numpy as np
+
+# Tile state codes stored in Grid.state
+PATH, WALL, START, GOAL, OPEN, CLOSED, SOLUTION = range(7)
+state_names = ["path", "wall", "start", "goal", "open", "closed", "solution"]
+
+# Move directions in the same order as get_neighbor_coords: N, E, S, W, NE, SE, SW, NW
+directions = [(0, -1), (1, 0), (0, 1), (-1, 0), (1, -1), (1, 1), (-1, 1), (-1, -1)]
+move_lengths = [1, 1, 1, 1, 2 ** .5, 2 ** .5, 2 ** .5, 2 ** .5]
+# A diagonal is only allowed when one of the two orthogonal moves it is made of is allowed (no squeezing between walls)
+diagonal_sides = {4: (0, 1), 5: (2, 1), 6: (2, 3), 7: (0, 3)}
+# move_directions[mask] lists the directions whose bit is set in a Grid.moves mask. Use mask & 15 for 4-connectivity
+move_directions = [tuple(direction for direction in range(8) if mask >> direction & 1) for mask in range(256)]
+
+
+class Grid:
+    # state/weight/moves can be passed in to wrap existing arrays (e.g. shared memory) without copying them.
+    # scores=False skips the per-search g/f/parent arrays for users that keep their own (see batch.py)
+    def __init__(self, width, height, state=None, weight=None, moves=None, scores=True):
+        self.width = width = int(width)
+        self.height = height = int(height)
+        self.shape = (width, height)
+        self.state = np.zeros(self.shape, np.uint8) if state is None else state
+        # cost multiplier for stepping onto a tile: a move costs its length times the weight of the tile it ends on
+        self.weight = np.ones(self.shape, np.float32) if weight is None else weight
+        if scores:
+            self.g = np.full(self.shape, np.inf)  # distance from the start tile
+            self.f = np.full(self.shape, np.inf)  # queue priority (g + h for A*)
+            self.parent = np.full(self.shape, -1, np.int32)  # flat index of the tile we came from
+        else:
+            self.g = self.f = self.parent = None
+        # flat index offset of every direction
+        self.offsets = [dx * height + dy for dx, dy in directions]
+        # called as listener(x, y) after a tile's walls/weight changed through set_state/set_weight, and as
+        # listener(None, None) after a change to the whole grid (reset, fill_walls, load_weights)
+        self.listeners = []
+        self.components = None  # connected components of the walkable tiles, see components.get_components
+        self.clusters = None  # HPA* abstract graph, see hierarchical.get_cluster_graph
+        self.fields = None  # cached distance fields, see fields.get_distance_field
+        self.wall_bits = None  # walls packed 1 bit per tile, see wall_bits.get_wall_bits
+        # Bitmask of the allowed moves out of every tile (bit n is directions[n]), 0 for walls. It is kept up to date
+        # by set_state/reset/fill_walls; call build_moves() (and changed() for the listeners) after writing walls into
+        # self.state directly
+        if moves is None:
+            self.build_moves()
+        else:
+            self.moves = moves
+
+    def __repr__(self):
+        return f"Grid {self.width}x{self.height}"
+
+    def index(self, x, y):
+        return x * self.height + y
+
+    def coord(self, index):
+        return divmod(int(index), self.height)
+
+    def within_board(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def walkable(self, x, y):
+        return self.state[x, y] != WALL
+
+    def set_state(self, x, y, state):  # writes a state and keeps the move masks around the tile up to date
+        was_wall = self.state[x, y] == WALL
+        self.state[x, y] = state
+        if was_wall != (state == WALL):
+            self.update_moves(x, y)
+            self.changed(x, y)
+
+    def set_weight(self, x, y, weight):
+        self.weight[x, y] = weight
+        self.changed(x, y)
+
+    def changed(self, x=None, y=None):  # tells the listeners a tile (or with no coords, the whole grid) changed
+        for listener in self.listeners:
+            listener(x, y)
+
+    def build_moves(self):  # recomputes every move mask in one vectorized pass
+        open_tiles = np.zeros((self.width + 2, self.height + 2), bool)
+        open_tiles[1:-1, 1:-1] = self.state != WALL
+        moves = np.zeros(self.shape, np.uint8)
+        for direction, (dx, dy) in enumerate(directions):
+            allowed = open_tiles[1 + dx:self.width + 1 + dx, 1 + dy:self.height + 1 + dy]
+            if direction in diagonal_sides:
+                side1, side2 = diagonal_sides[direction]
+                allowed = allowed & ((moves >> side1 | moves >> side2) & 1).astype(bool)
+            moves |= allowed.astype(np.uint8) << direction
+        moves[self.state == WALL] = 0
+        if getattr(self, "moves", None) is None:
+            self.moves = moves
+        else:
+            self.moves[...] = moves  # in place, the array may be shared
+
+    def update_moves(self, x, y):  # a wall changed at x, y so only the masks of the 3x3 block around it can change
+        for nx in range(max(x - 1, 0), min(x + 2, self.width)):
+            for ny in range(max(y - 1, 0), min(y + 2, self.height)):
+                self.moves[nx, ny] = self.get_moves(nx, ny)
+
+    def get_moves(self, x, y):
+        if self.state[x, y] == WALL:
+            return 0
+        mask = 0
+        for direction, (dx, dy) in enumerate(directions):
+            if self.within_board(x + dx, y + dy) and self.state[x + dx, y + dy] != WALL:
+                if direction in diagonal_sides:
+                    side1, side2 = diagonal_sides[direction]
+                    if not (mask >> side1 | mask >> side2) & 1:
+                        continue
+                mask |= 1 << direction
+        return mask
+
+    def weight_range(self):  # cheapest and most expensive tile to step onto, walls excluded
+        weights = self.weight[self.state != WALL]
+        if weights.size == 0:
+            return 1.0, 1.0
+        return float(weights.min()), float(weights.max())
+
+    def load_weights(self, path):  # .npy or a whitespace/comma separated text file, one row per x
+        if str(path).endswith(".npy"):
+            weights = np.load(path)
+        else:
+            weights = np.loadtxt(path, delimiter="," if str(path).endswith(".csv") else None)
+        if weights.shape != self.shape:
+            raise ValueError(f"weights are {weights.shape}, the grid is {self.shape}")
+        if (weights <= 0).any():
+            raise ValueError("weights must be positive")
+        self.weight[...] = weights
+        self.changed()
+
+    def clear_search(self):  # forgets scores/parents and turns searched tiles back into path
+        self.g.fill(np.inf)
+        self.f.fill(np.inf)
+        self.parent.fill(-1)
+        self.state[self.state >= OPEN] = PATH
+
+    def reset(self):  # empty board
+        self.state.fill(PATH)
+        self.build_moves()
+        self.weight.fill(1)
+        self.g.fill(np.inf)
+        self.f.fill(np.inf)
+        self.parent.fill(-1)
+        self.changed()
+
+    def fill_walls(self):
+        self.state.fill(WALL)
+        self.moves.fill(0)
+        self.changed()
+
+    def get_path(self, goal):  # walks the parent chain from the goal's flat index back to the start
+        parent = self.parent.reshape(-1)
+        path = [goal]
+        while parent[path[-1]] != -1:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+        return [self.coord(index) for index in path]
@@ -0,0 +1,194 @@
+# Saving and loading grids. The binary format is a fixed header, the walls packed 8 tiles to a byte and the tile
+# weights as float32, all in flat tile order (x * height + y), so big maps can be opened with np.memmap without
+# reading the weights into memory. MovingAI benchmark maps (.map) and scenarios (.scen) can be imported too.
+# Wall bits files (save_wall_bits) hold a WallBits as it is in memory, so loading one with mmap=True maps it in place
+# and every process that maps the same file shares one copy of it through the page cache
+import random
+import struct
+from collections import namedtuple
+import numpy as np
+from .batch import batch_search
+from .grid import Grid, PATH, WALL
+from .wall_bits import WallBits
+
+MAGIC = b"PTGRID\0\0"
+VERSION = 1
+# magic, version, width, height, flags, start x, start y, goal x, goal y (-1 when there is no start/goal)
+HEADER = struct.Struct("<8sIIIIiiii")
+HAS_WEIGHTS = 1
+
+WALL_BITS_MAGIC = b"PTBITS\0\0"
+WALL_BITS_VERSION = 1
+# magic, version, width, height, words per column, words per row. The header is 8 byte aligned so the words are too
+WALL_BITS_HEADER = struct.Struct("<8sIIIIII")
+
+Scenario = namedtuple("Scenario", "bucket map width height start goal optimal_length")
+
+# MovingAI terrain that can be walked on. Swamp (S) and water (W) are only passable from the same terrain in the
+# benchmarks, swamp is treated as ground and water as a wall here
+movingai_walkable = set(".GS")
+
+
+def _data_offsets(width, height):  # where the walls and the weights start, the weights are 4 byte aligned
+    walls_offset = HEADER.size
+    weights_offset = walls_offset + (width * height + 7) // 8
+    return walls_offset, weights_offset + -weights_offset % 4
+
+
+def save_grid(grid, path, start=None, goal=None):
+    start_x, start_y = start if start is not None else (-1, -1)
+    goal_x, goal_y = goal if goal is not None else (-1, -1)
+    has_weights = bool((grid.weight != 1).any())
+    walls_offset, weights_offset = _data_offsets(grid.width, grid.height)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, grid.width, grid.height, HAS_WEIGHTS if has_weights else 0,
+                               start_x, start_y, goal_x, goal_y))
+        file.write(np.packbits(grid.state.reshape(-1) == WALL).tobytes())
+        if has_weights:
+            file.write(bytes(weights_offset - file.tell()))
+            file.write(grid.weight.astype("<f4").tobytes())
+
+
+def read_header(path):  # (width, height, flags, start, goal)
+    with open(path, "rb") as file:
+        data = file.read(HEADER.size)
+    if len(data) < HEADER.size or data[:8] != MAGIC:
+        raise ValueError(f"{path} is not a grid file")
+    magic, version, width, height, flags, start_x, start_y, goal_x, goal_y = HEADER.unpack(data)
+    if version != VERSION:
+        raise ValueError(f"{path} is grid format version {version}, only {VERSION} can be read")
+    start = (start_x, start_y) if start_x >= 0 else None
+    goal = (goal_x, goal_y) if goal_x >= 0 else None
+    return width, height, flags, start, goal
+
+
+def load_grid(path, mmap=False):
+    # Returns (grid, start, goal). With mmap=True the weights stay in the file (copy-on-write, so painting them
+    # doesn't change the file) and only the walls are unpacked into memory
+    width, height, flags, start, goal = read_header(path)
+    walls_offset, weights_offset = _data_offsets(width, height)
+    size = width * height
+    if mmap:
+        walls = np.memmap(path, np.uint8, "r", walls_offset, ((size + 7) // 8,))
+    else:
+        walls = np.fromfile(path, np.uint8, (size + 7) // 8, offset=walls_offset)
+    state = np.where(np.unpackbits(walls, count=size).astype(bool), WALL, PATH).astype(np.uint8)
+    state = state.reshape(width, height)
+
+    weight = None
+    if flags & HAS_WEIGHTS:
+        if mmap:
+            weight = np.memmap(path, "<f4", "c", weights_offset, (width, height))
+        else:
+            weight = np.fromfile(path, "<f4", size, offset=weights_offset).astype(np.float32).reshape(width, height)
+    return Grid(width, height, state=state, weight=weight), start, goal
+
+
+def map_board(path):
+    # A saved board memory-mapped read only as it is in the file, without making a Grid: (width, height, walls,
+    # weights, start, goal). walls are the packed bits (set for a wall) in flat tile order, weights is a float32
+    # (width, height) array or None when the board has no weights
+    width, height, flags, start, goal = read_header(path)
+    walls_offset, weights_offset = _data_offsets(width, height)
+    walls = np.memmap(path, np.uint8, "r", walls_offset, ((width * height + 7) // 8,))
+    weights = np.memmap(path, "<f4", "r", weights_offset, (width, height)) if flags & HAS_WEIGHTS else None
+    return width, height, walls, weights, start, goal
+
+
+def save_wall_bits(wall_bits, path):  # the columns then the rows, as the little endian words WallBits keeps
+    with open(path, "wb") as file:
+        file.write(WALL_BITS_HEADER.pack(WALL_BITS_MAGIC, WALL_BITS_VERSION, wall_bits.width, wall_bits.height,
+                                         wall_bits.column_stride, wall_bits.row_stride, 0))
+        file.write(wall_bits.columns.tobytes())
+        file.write(wall_bits.rows.tobytes())
+
+
+def load_wall_bits(path, mmap=True):
+    # With mmap=True (the default, this format is meant for maps too big to load every time) the words stay in the
+    # file, mapped read only
+    with open(path, "rb") as file:
+        data = file.read(WALL_BITS_HEADER.size)
+    if len(data) < WALL_BITS_HEADER.size or data[:8] != WALL_BITS_MAGIC:
+        raise ValueError(f"{path} is not a wall bits file")
+    magic, version, width, height, column_stride, row_stride, _ = WALL_BITS_HEADER.unpack(data)
+    if version != WALL_BITS_VERSION:
+        raise ValueError(f"{path} is wall bits format version {version}, only {WALL_BITS_VERSION} can be read")
+    columns_shape = (width + 2, column_stride)
+    rows_shape = (height + 2, row_stride)
+    rows_offset = WALL_BITS_HEADER.size + 8 * columns_shape[0] * column_stride
+    if mmap:
+        columns = np.memmap(path, "<u8", "r", WALL_BITS_HEADER.size, columns_shape)
+        rows = np.memmap(path, "<u8", "r", rows_offset, rows_shape)
+    else:
+        columns = np.fromfile(path, "<u8", columns_shape[0] * column_stride, offset=WALL_BITS_HEADER.size)
+        rows = np.fromfile(path, "<u8", rows_shape[0] * row_stride, offset=rows_offset)
+        columns, rows = columns.reshape(columns_shape), rows.reshape(rows_shape)
+    return WallBits(width, height, columns, rows)
+
+
+def load_movingai_map(path):
+    # Note the diagonal rule differs: MovingAI only allows a diagonal when both orthogonal tiles are free, this grid
+    # when one of them is, so paths found here can be shorter than the scenarios' optimal lengths
+    with open(path) as file:
+        lines = file.read().splitlines()
+    header = {}
+    row = 0
+    while row < len(lines) and lines[row].strip() != "map":
+        key, _, value = lines[row].partition(" ")
+        header[key] = value.strip()
+        row += 1
+    width, height = int(header["width"]), int(header["height"])
+    rows = lines[row + 1:row + 1 + height]
+    if len(rows) != height or any(len(line) < width for line in rows):
+        raise ValueError(f"{path} doesn't have {height} rows of {width} tiles")
+
+    tiles = np.array([list(line[:width]) for line in rows])  # [y, x]
+    walkable = np.isin(tiles, list(movingai_walkable))
+    state = np.where(walkable.T, PATH, WALL).astype(np.uint8)
+    return Grid(width, height, state=np.ascontiguousarray(state))
+
+
+def save_movingai_map(grid, path):
+    tiles = np.where(grid.state.T == WALL, "@", ".")
+    with open(path, "w") as file:
+        file.write(f"type octile\nheight {grid.height}\nwidth {grid.width}\nmap\n")
+        file.writelines("".join(row) + "\n" for row in tiles)
+
+
+def load_movingai_scenarios(path):
+    scenarios = []
+    with open(path) as file:
+        for line in file:
+            fields = line.split("\t")
+            if len(fields) < 9:  # the "version x" line
+                continue
+            bucket, map_name, width, height, start_x, start_y, goal_x, goal_y, optimal_length = fields[:9]
+            scenarios.append(Scenario(int(bucket), map_name, int(width), int(height), (int(start_x), int(start_y)),
+                                      (int(goal_x), int(goal_y)), float(optimal_length)))
+    return scenarios
+
+
+def save_movingai_scenarios(scenarios, path):
+    with open(path, "w") as file:
+        file.write("version 1\n")
+        for scenario in scenarios:
+            file.write(f"{scenario.bucket}\t{scenario.map}\t{scenario.width}\t{scenario.height}\t"
+                       f"{scenario.start[0]}\t{scenario.start[1]}\t{scenario.goal[0]}\t{scenario.goal[1]}\t"
+                       f"{scenario.optimal_length:.8f}\n")
+
+
+def random_scenarios(grid, count, seed=None, map_name=""):
+    # count reachable start/goal pairs picked with random.Random(seed), with their costs on this grid. The bucket is
+    # the cost divided by 4 like the MovingAI sets
+    rng = random.Random(seed)
+    walkable = np.flatnonzero(grid.state.reshape(-1) != WALL)
+    scenarios = []
+    for _ in range(100):  # gives up on grids where random pairs are hardly ever connected
+        if walkable.size < 2 or len(scenarios) == count:
+            break
+        queries = [(grid.coord(rng.choice(walkable)), grid.coord(rng.choice(walkable)))
+                   for _ in range(count - len(scenarios))]
+        for (start, goal), (path, cost) in zip(queries, batch_search(grid, queries)):
+            if path is not None and start != goal:
+                scenarios.append(Scenario(int(cost // 4), map_name, grid.width, grid.height, start, goal, cost))
+    return scenarios
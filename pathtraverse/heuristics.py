@@ -0,0 +1,44 @@
+# Distance estimates to the goal. Every heuristic takes the absolute x/y differences and only uses arithmetic and
+# abs(), so the same function works lazily on one tile or vectorized on whole NumPy arrays (see heuristic_field)
+import numpy as np
+
+SQRT2 = 2 ** .5
+
+
+def manhattan(dx, dy):  # exact for 4-connected moves, overestimates with diagonals
+    return dx + dy
+
+
+def octile(dx, dy):  # exact on an empty 8-connected grid where diagonals cost sqrt(2)
+    return chebyshev(dx, dy) + (SQRT2 - 1) * (dx + dy - abs(dx - dy)) / 2
+
+
+def chebyshev(dx, dy):  # max(dx, dy), diagonals counted as 1
+    return (dx + dy + abs(dx - dy)) / 2
+
+
+def euclidean(dx, dy):  # straight line distance
+    return (dx * dx + dy * dy) ** .5
+
+
+def zero(dx, dy):  # turns A* into Dijkstra
+    return 0 * dx
+
+
+heuristics_by_name = {
+    "octile": octile,
+    "manhattan": manhattan,
+    "chebyshev": chebyshev,
+    "euclidean": euclidean,
+    "zero": zero
+}
+
+
+def get_heuristic(heuristic, coord, goal):
+    return heuristic(abs(coord[0] - goal[0]), abs(coord[1] - goal[1]))
+
+
+def heuristic_field(grid, goal, heuristic=octile):  # heuristic of every tile in one vectorized pass
+    dx = np.abs(np.arange(grid.width) - goal[0])[:, None]
+    dy = np.abs(np.arange(grid.height) - goal[1])[None, :]
+    return np.broadcast_to(heuristic(dx, dy), grid.shape).astype(float)
@@ -0,0 +1,273 @@
+# Hierarchical pathfinding (HPA*). The grid is cut into square clusters, and every run of walkable tiles across a
+# cluster border gets entrances (one in the middle of a short run, one at each end of a long one). The abstract graph
+# has the entrance tiles as nodes, with an edge across the border between the two tiles of an entrance and edges
+# between the entrances of a cluster costing the shortest route inside it. A query joins the start and goal to the
+# entrances of their clusters, runs A* over the abstract graph and refines every abstract edge with a search inside
+# one cluster. The paths are close to optimal but not always optimal, as routes have to go through the entrances.
+# A cluster's edges are built the first time a search reaches it and kept, and the grid's listeners drop the clusters
+# around an edited tile, so after a wall edit only those are built again
+import math
+import numpy as np
+from .components import get_components
+from .grid import OPEN, CLOSED, WALL, directions, move_directions, move_lengths
+from .heuristics import octile
+from .tile_queues import PriorityQueue, counted
+
+
+def get_cluster_graph(grid, cluster_size=16):  # the grid's abstract graph, made on first use
+    if grid.clusters is None or grid.clusters.cluster_size != cluster_size:
+        if grid.clusters is not None:
+            grid.clusters.close()
+        grid.clusters = ClusterGraph(grid, cluster_size)
+    return grid.clusters
+
+
+class ClusterGraph:
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.columns = math.ceil(grid.width / cluster_size)
+        self.rows = math.ceil(grid.height / cluster_size)
+        # (cluster x, cluster y) -> {entrance tile: [(tile, cost), ...]}, the edges out of the cluster's entrances
+        self.clusters = {}
+        self.builds = 0  # clusters built so far
+        grid.listeners.append(self.tile_changed)
+
+    def close(self):  # stops following the grid's edits
+        if self.tile_changed in self.grid.listeners:
+            self.grid.listeners.remove(self.tile_changed)
+        if self.grid.clusters is self:
+            self.grid.clusters = None
+
+    def tile_changed(self, x=None, y=None):
+        if x is None:
+            self.clusters.clear()
+            return
+        # the tile's moves and the cost of stepping onto it from its neighbors changed, which can be in the clusters
+        # next to it when it is on a border
+        size = self.cluster_size
+        for cluster_x in range(max(x - 1, 0) // size, min(x + 1, self.grid.width - 1) // size + 1):
+            for cluster_y in range(max(y - 1, 0) // size, min(y + 1, self.grid.height - 1) // size + 1):
+                self.clusters.pop((cluster_x, cluster_y), None)
+
+    def build(self):  # builds every cluster up front instead of on first use
+        for cluster_x in range(self.columns):
+            for cluster_y in range(self.rows):
+                self.cluster(cluster_x, cluster_y)
+
+    def cluster_of(self, index):
+        x, y = divmod(index, self.grid.height)
+        return x // self.cluster_size, y // self.cluster_size
+
+    def bounds(self, cluster_x, cluster_y):  # first x, first y, last x + 1, last y + 1
+        size = self.cluster_size
+        return (cluster_x * size, cluster_y * size, min((cluster_x + 1) * size, self.grid.width),
+                min((cluster_y + 1) * size, self.grid.height))
+
+    def cluster(self, cluster_x, cluster_y):  # the edges out of a cluster's entrances, built on first use
+        edges = self.clusters.get((cluster_x, cluster_y))
+        if edges is None:
+            edges = self._build(cluster_x, cluster_y)
+            self.clusters[cluster_x, cluster_y] = edges
+        return edges
+
+    def edges(self, index):  # abstract edges out of an entrance tile
+        return self.cluster(*self.cluster_of(index)).get(index, [])
+
+    def entrances(self, cluster_x, cluster_y):
+        # (inside tile, outside tile) of every entrance on the cluster's borders. Both clusters of a border walk it the
+        # same way, so they agree on the entrances
+        grid = self.grid
+        height = grid.height
+        first_x, first_y, end_x, end_y = self.bounds(cluster_x, cluster_y)
+        borders = []
+        if first_x > 0:  # west
+            borders.append([(first_x * height + y, (first_x - 1) * height + y) for y in range(first_y, end_y)])
+        if end_x < grid.width:  # east
+            borders.append([((end_x - 1) * height + y, end_x * height + y) for y in range(first_y, end_y)])
+        if first_y > 0:  # north
+            borders.append([(x * height + first_y, x * height + first_y - 1) for x in range(first_x, end_x)])
+        if end_y < grid.height:  # south
+            borders.append([(x * height + end_y - 1, x * height + end_y) for x in range(first_x, end_x)])
+
+        state = grid.state.reshape(-1)
+        entrances = []
+        for border in borders:
+            run = []
+            for inside, outside in border + [(None, None)]:
+                if inside is not None and state[inside] != WALL and state[outside] != WALL:
+                    run.append((inside, outside))
+                    continue
+                if len(run) >= 6:
+                    entrances += [run[0], run[-1]]
+                elif run:
+                    entrances.append(run[len(run) // 2])
+                run = []
+        return entrances
+
+    def _build(self, cluster_x, cluster_y):
+        self.builds += 1
+        height = self.grid.height
+        weight = self.grid.weight.reshape(-1)
+        first_x, first_y, end_x, end_y = bounds = self.bounds(cluster_x, cluster_y)
+        edges = {}
+        for inside, outside in self.entrances(cluster_x, cluster_y):
+            edges.setdefault(inside, []).append((outside, float(weight[outside])))
+        nodes = list(edges)
+        costs = self.cluster_costs(bounds, nodes)
+        for number, node in enumerate(nodes):
+            for other in nodes:
+                x, y = divmod(other, height)
+                cost = costs[number, x - first_x, y - first_y]
+                if other != node and cost < math.inf:
+                    edges[node].append((other, float(cost)))
+        return edges
+
+    def cluster_costs(self, bounds, sources):
+        # Costs from every source to every tile of a cluster, [source number, x, y]. All the sources are relaxed
+        # together with NumPy, sweeping the 8 move directions until nothing improves, which takes about as many sweeps
+        # as the longest route inside the cluster has tiles
+        grid = self.grid
+        first_x, first_y, end_x, end_y = bounds
+        width, height = end_x - first_x, end_y - first_y
+        moves = grid.moves[first_x:end_x, first_y:end_y]
+        weight = grid.weight[first_x:end_x, first_y:end_y].astype(float)
+        costs = np.full((len(sources), width, height), np.inf)
+        for number, source in enumerate(sources):
+            x, y = divmod(source, grid.height)
+            costs[number, x - first_x, y - first_y] = 0
+
+        steps = []  # (from slices, to slices, cost of the move or inf where it isn't allowed)
+        for direction, (dx, dy) in enumerate(directions):
+            if abs(dx) >= width or abs(dy) >= height:
+                continue
+            from_x, to_x = slice(max(-dx, 0), width - max(dx, 0)), slice(max(dx, 0), width - max(-dx, 0))
+            from_y, to_y = slice(max(-dy, 0), height - max(dy, 0)), slice(max(dy, 0), height - max(-dy, 0))
+            allowed = (moves[from_x, from_y] >> direction & 1).astype(bool)
+            steps.append(((slice(None), from_x, from_y), (slice(None), to_x, to_y),
+                          np.where(allowed, move_lengths[direction] * weight[to_x, to_y], np.inf)))
+        improved = True
+        while improved:
+            improved = False
+            for from_slices, to_slices, move_cost in steps:
+                through = costs[from_slices] + move_cost
+                better = through < costs[to_slices]
+                if better.any():
+                    costs[to_slices] = np.where(better, through, costs[to_slices])
+                    improved = True
+        return costs
+
+    def local_search(self, source, bounds, targets, backward=False, stats=None):
+        # Dijkstra from source that stays inside bounds and stops once every target is reached. Returns the costs and
+        # parents of the tiles it reached. backward gives the cost from every tile to source instead (going back over
+        # the move neighbor -> current costs the weight of current)
+        grid = self.grid
+        moves = grid.moves.reshape(-1)
+        weight = grid.weight.reshape(-1)
+        offsets = grid.offsets
+        height = grid.height
+        first_x, first_y, end_x, end_y = bounds
+        costs = {source: 0.0}
+        parents = {source: -1}
+        done = set()
+        remaining = set(targets)
+        queue = counted(PriorityQueue(), stats)
+        queue.insert(source, 0.0)
+        while not queue.is_empty() and remaining:
+            current = queue.remove()
+            done.add(current)
+            remaining.discard(current)
+            for direction in move_directions[moves[current]]:
+                neighbor = current + offsets[direction]
+                x, y = divmod(neighbor, height)
+                if neighbor in done or not (first_x <= x < end_x and first_y <= y < end_y):
+                    continue
+                cost = costs[current] + move_lengths[direction] * float(weight[current if backward else neighbor])
+                if cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = cost
+                    parents[neighbor] = current
+                    queue.insert(neighbor, cost)
+        return {tile: costs[tile] for tile in done}, parents
+
+    def local_path(self, source, target, stats=None):  # tile indexes from source to target, inside source's cluster
+        _, parents = self.local_search(source, self.bounds(*self.cluster_of(source)), {target}, stats=stats)
+        path = [target]
+        while parents[path[-1]] != -1:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return path
+
+
+def hierarchical_steps(grid, start, goal, heuristic=octile, cluster_size=16, stats=None):
+    # Generator like the engine searches, its OPEN/CLOSED events are the entrances the abstract search queues/expands
+    grid.clear_search()
+    if not get_components(grid).connected(start, goal):
+        return None
+    graph = get_cluster_graph(grid, cluster_size)
+    state = grid.state.reshape(-1)
+    height = grid.height
+    goal_x, goal_y = goal
+    start_index = grid.index(*start)
+    goal_index = grid.index(*goal)
+    if start_index == goal_index:
+        return [start]
+    heuristic_scale = grid.weight_range()[0]
+
+    # the start and goal join the abstract graph through the entrances of their clusters (and each other when they
+    # share a cluster)
+    start_cluster, goal_cluster = graph.cluster_of(start_index), graph.cluster_of(goal_index)
+    start_nodes = set(graph.cluster(*start_cluster))
+    goal_nodes = set(graph.cluster(*goal_cluster))
+    if start_cluster == goal_cluster:
+        start_nodes.add(goal_index)
+    start_costs, _ = graph.local_search(start_index, graph.bounds(*start_cluster), start_nodes, stats=stats)
+    start_edges = [(node, cost) for node, cost in start_costs.items() if node in start_nodes and node != start_index]
+    goal_costs, _ = graph.local_search(goal_index, graph.bounds(*goal_cluster), goal_nodes, backward=True, stats=stats)
+
+    g = {start_index: 0.0}
+    parent = {start_index: -1}
+    closed = set()
+    open_queue = counted(PriorityQueue(), stats)
+    open_queue.insert(start_index, heuristic_scale * heuristic(abs(start[0] - goal_x), abs(start[1] - goal_y)))
+    while not open_queue.is_empty():
+        current = open_queue.remove()
+        if current == goal_index:
+            break
+        closed.add(current)
+        if current != start_index:
+            state[current] = CLOSED
+            yield current, CLOSED
+
+        edges = graph.edges(current)  # the start can be an entrance itself
+        if current == start_index:
+            edges = start_edges + edges
+        if current in goal_costs and current != start_index:
+            edges = edges + [(goal_index, goal_costs[current])]
+        for neighbor, cost in edges:
+            if neighbor in closed:
+                continue
+            new_g = g[current] + cost
+            if new_g < g.get(neighbor, math.inf):
+                g[neighbor] = new_g
+                parent[neighbor] = current
+                x, y = divmod(neighbor, height)
+                queued = neighbor in open_queue
+                open_queue.insert(neighbor, new_g + heuristic_scale * heuristic(abs(x - goal_x), abs(y - goal_y)))
+                if not queued and neighbor != goal_index and neighbor != start_index:
+                    state[neighbor] = OPEN
+                    yield neighbor, OPEN
+    if goal_index not in parent:
+        return None
+
+    nodes = [goal_index]
+    while parent[nodes[-1]] != -1:
+        nodes.append(parent[nodes[-1]])
+    nodes.reverse()
+    # refine: an edge inside a cluster is searched again in that cluster, an edge across a border is a single move
+    path = [start_index]
+    for node, next_node in zip(nodes, nodes[1:]):
+        if graph.cluster_of(node) == graph.cluster_of(next_node):
+            path += graph.local_path(node, next_node, stats)[1:]
+        else:
+            path.append(next_node)
+    return [grid.coord(index) for index in path]
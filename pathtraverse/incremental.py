@@ -0,0 +1,180 @@
+# D* Lite: an incremental planner that keeps its search between plans. It searches backward from the goal, so g/rhs
+# are costs to the goal, and registers itself as a grid listener: when walls or weights change, only the tiles whose
+# moves changed get their rhs recomputed, and the next plan only expands the region those changes affect instead of
+# searching the whole board again. Moving the start only shifts the queue keys (km), moving the goal needs a new
+# planner. Costs and the diagonal rule are the engine's: a move costs its length times the weight of the tile it ends on
+import numpy as np
+from .components import get_components
+from .grid import PATH, OPEN, CLOSED, move_directions, move_lengths
+from .heuristics import octile
+from .tile_queues import PriorityQueue, counted
+
+
+class DStarLite:
+    def __init__(self, grid, start, goal, heuristic=octile):
+        self.grid = grid
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.heuristic = heuristic
+        self.heuristic_scale = 0
+        self.changed_tiles = set()  # tiles edited since the last plan
+        self.reset_needed = True  # the whole grid changed, start over on the next plan
+        self.expansions = 0  # tiles expanded by the last plan
+        grid.listeners.append(self.tile_changed)
+
+    def close(self):  # stops listening to the grid
+        if self.tile_changed in self.grid.listeners:
+            self.grid.listeners.remove(self.tile_changed)
+
+    def tile_changed(self, x=None, y=None):
+        if x is None or self.grid.weight[x, y] < self.heuristic_scale:
+            # a cheaper tile than the heuristic was scaled for would make it overestimate
+            self.reset_needed = True
+        else:
+            self.changed_tiles.add((x, y))
+
+    def move_start(self, start):
+        start = tuple(start)
+        if start != self.start and not self.reset_needed:
+            self.km += self.distance(self.grid.index(*self.start), self.grid.index(*start))
+        self.start = start
+
+    def distance(self, index, other):  # heuristic between two flat indexes
+        x, y = divmod(index, self.grid.height)
+        other_x, other_y = divmod(other, self.grid.height)
+        return self.heuristic_scale * self.heuristic(abs(x - other_x), abs(y - other_y))
+
+    def key(self, index):
+        # The first component is rounded: along the optimal path g + h is the same for every tile in exact arithmetic,
+        # and a tie with the start lost to a rounding error would stop the repair before the path is up to date
+        best = min(self.g[index], self.rhs[index])
+        return round(best + self.distance(self.start_index, index) + self.km, 9), best
+
+    def plan(self):  # repairs the search and returns the path from start to goal, None if there is none
+        steps = self.plan_steps()
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def plan_steps(self, stats=None):
+        # Generator like the engine searches: yields (index, OPEN/CLOSED) events for the tiles it queues and expands
+        # and returns the path. The events of an expansion are only yielded once it is complete, so the planner stays
+        # consistent if the generator is dropped halfway (the next plan carries on from there). With stats, the queue
+        # operations of this plan are counted into them (the queue the planner keeps stays a plain one)
+        grid = self.grid
+        grid.clear_search()
+        if not get_components(grid).connected(self.start, self.goal):  # the edits stay queued for the next plan
+            return None
+        self.start_index = grid.index(*self.start)
+        self.goal_index = grid.index(*self.goal)
+        self.expansions = 0
+        events = []
+        reset = self.reset_needed
+        if reset:
+            self._reset()
+        queue = counted(self.queue, stats)
+        if reset:
+            queue.insert(self.goal_index, self.key(self.goal_index))
+        else:
+            for x, y in self.changed_tiles:  # the moves of the 3x3 block around an edited tile may have changed
+                for block_x in range(max(x - 1, 0), min(x + 2, grid.width)):
+                    for block_y in range(max(y - 1, 0), min(y + 2, grid.height)):
+                        self._update_tile(grid.index(block_x, block_y), events, queue)
+        self.changed_tiles.clear()
+        yield from events
+
+        start_index = self.start_index
+        g, rhs = self.g, self.rhs
+        moves = grid.moves.reshape(-1)
+        offsets = grid.offsets
+        state = grid.state.reshape(-1)
+        while not queue.is_empty():
+            top_key = queue.peek_priority()
+            if not (top_key < self.key(start_index) or rhs[start_index] > g[start_index]):
+                break
+            current = queue.peek()
+            new_key = self.key(current)
+            if top_key < new_key:  # its key went up since it was queued (km changed)
+                queue.update(current, new_key)
+                continue
+            queue.remove()
+            self.expansions += 1
+            events = []
+            if current != start_index and current != self.goal_index and state[current] in (PATH, OPEN):
+                state[current] = CLOSED
+                events.append((current, CLOSED))
+            neighbors = [current + offsets[direction] for direction in move_directions[moves[current]]]
+            if g[current] > rhs[current]:
+                g[current] = rhs[current]
+            else:
+                g[current] = np.inf
+                neighbors.append(current)
+            for neighbor in neighbors:
+                self._update_tile(neighbor, events, queue)
+            yield from events
+
+        return self.get_path()
+
+    def _reset(self):  # the goal still has to be queued
+        size = self.grid.width * self.grid.height
+        self.g = np.full(size, np.inf)
+        self.rhs = np.full(size, np.inf)
+        self.queue = PriorityQueue()
+        self.km = 0
+        self.heuristic_scale = self.grid.weight_range()[0]
+        self.rhs[self.goal_index] = 0
+        self.reset_needed = False
+
+    def _update_tile(self, index, events, queue):
+        # recomputes rhs from the successors and (re)queues the tile if inconsistent. queue is self.queue, or the
+        # CountingQueue over it the plan runs with
+        grid = self.grid
+        g, rhs = self.g, self.rhs
+        if index != self.goal_index:
+            weight = grid.weight.reshape(-1)
+            best = np.inf
+            for direction in move_directions[grid.moves.reshape(-1)[index]]:
+                neighbor = index + grid.offsets[direction]
+                cost = move_lengths[direction] * float(weight[neighbor]) + g[neighbor]
+                if cost < best:
+                    best = cost
+            rhs[index] = best
+        queue.discard(index)
+        if g[index] != rhs[index]:
+            queue.insert(index, self.key(index))
+            state = grid.state.reshape(-1)
+            if index != self.start_index and index != self.goal_index and state[index] == PATH:
+                state[index] = OPEN
+                events.append((index, OPEN))
+
+    def get_path(self):  # follows the cheapest successor from the start down to the goal
+        grid = self.grid
+        g = self.g
+        weight = grid.weight.reshape(-1)
+        moves = grid.moves.reshape(-1)
+        current = self.start_index
+        if self.rhs[current] == np.inf:  # the start itself may stop before being expanded, its rhs is final though
+            return None
+        path = [current]
+        while current != self.goal_index and len(path) <= g.size:
+            best, best_neighbor = np.inf, -1
+            for direction in move_directions[moves[current]]:
+                neighbor = current + grid.offsets[direction]
+                cost = move_lengths[direction] * float(weight[neighbor]) + g[neighbor]
+                if cost < best:
+                    best, best_neighbor = cost, neighbor
+            if best_neighbor == -1:
+                return None
+            current = best_neighbor
+            path.append(current)
+        return [grid.coord(index) for index in path]
+
+
+def d_star_lite_steps(grid, start, goal, heuristic=octile, stats=None):  # one plan from scratch, for the registry
+    planner = DStarLite(grid, start, goal, heuristic)
+    try:
+        return (yield from planner.plan_steps(stats))
+    finally:
+        planner.close()
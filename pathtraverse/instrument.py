@@ -0,0 +1,136 @@
+# Optional instrumentation of a search run: expansions, queue pushes/pops/decrease-keys/re-openings, time spent in the
+# queue, the heuristic and the caller's on_visit (drawing), and the open list size after every pop. The searches that
+# use a queue take a stats argument and wrap their queues in a tile_queues.CountingQueue when it is given, so a search
+# that isn't instrumented runs plain queues, and searches running at the same time count into their own stats.
+#   python -m pathtraverse.instrument --search "A*" --size 300 --maze Prim --profile
+import argparse
+import cProfile
+import inspect
+import pstats
+from time import perf_counter
+from . import fields
+from .benchmark import random_map, maze_map
+from .engine import heuristic_searches, searches_by_name
+from .grid import CLOSED
+from .heuristics import octile
+from .maze_generators import mazes_by_name
+
+
+class SearchStats:
+    def __init__(self):
+        self.expansions = 0
+        self.pushes = 0
+        self.pops = 0
+        self.decrease_keys = 0
+        self.reopenings = 0  # pushes of tiles that were popped before
+        # seconds in each phase, "search" is everything else inside the search (neighbors, scores, bookkeeping)
+        self.times = {"total": 0.0, "queue": 0.0, "heuristic": 0.0, "visit": 0.0}
+        self.open_sizes = []  # open list size after every pop
+
+    @property
+    def peak_open(self):
+        return max(self.open_sizes, default=0)
+
+    def as_dict(self):
+        return {"expansions": self.expansions, "pushes": self.pushes, "pops": self.pops,
+                "decrease_keys": self.decrease_keys, "reopenings": self.reopenings, "peak_open": self.peak_open,
+                "times": dict(self.times, search=self.search_time())}
+
+    def search_time(self):
+        times = self.times
+        return times["total"] - times["queue"] - times["heuristic"] - times["visit"]
+
+    def report(self):
+        total = self.times["total"] or 1
+        lines = [f"expansions {self.expansions}, pushes {self.pushes}, pops {self.pops}, "
+                 f"decrease-keys {self.decrease_keys}, re-openings {self.reopenings}, peak open {self.peak_open}",
+                 f"total {self.times['total']:.4f}s"]
+        for phase, seconds in (("queue", self.times["queue"]), ("heuristic", self.times["heuristic"]),
+                               ("visit", self.times["visit"]), ("search", self.search_time())):
+            lines.append(f"  {phase:10} {seconds:.4f}s {100 * seconds / total:5.1f}%")
+        return "\n".join(lines)
+
+
+def instrumented_steps(stats, steps, grid, start, goal, **options):
+    # Wraps a search generator (a searches_by_name entry) and yields its events, recording into stats. The time spent
+    # by whoever consumes the events isn't counted, so it can be played frame by frame too
+    if steps in heuristic_searches:
+        heuristic = options.get("heuristic", octile)
+
+        def timed_heuristic(dx, dy):
+            began = perf_counter()
+            value = heuristic(dx, dy)
+            stats.times["heuristic"] += perf_counter() - began
+            return value
+
+        options["heuristic"] = timed_heuristic
+    if "stats" in inspect.signature(steps).parameters:  # searches without a queue (and the compiled ones) take none
+        options["stats"] = stats
+    search = steps(grid, start, goal, **options)
+    cached_field = fields.find_field(grid, goal)
+    while True:
+        began = perf_counter()
+        try:
+            index, state = next(search)
+        except StopIteration as stop:
+            stats.times["total"] += perf_counter() - began
+            field = fields.find_field(grid, goal)
+            if steps is fields.flow_field_steps and field is not None and field is not cached_field:
+                # the flow field yields no events, computing its field was the work
+                stats.expansions += field.settled
+            return stop.value
+        stats.times["total"] += perf_counter() - began
+        if state == CLOSED:
+            stats.expansions += 1
+        yield index, state
+
+
+def instrument_search(steps, grid, start, goal, on_visit=None, profiler=None, **options):
+    # Runs one instrumented search and returns (path, stats). profiler is anything with enable()/disable() like
+    # cProfile.Profile, or start()/stop() like most sampling profilers, and is only running during the search
+    stats = SearchStats()
+    search = instrumented_steps(stats, steps, grid, start, goal, **options)
+    if profiler is not None:
+        (profiler.enable if hasattr(profiler, "enable") else profiler.start)()
+    try:
+        while True:
+            try:
+                index, state = next(search)
+            except StopIteration as stop:
+                return stop.value, stats
+            if on_visit:
+                began = perf_counter()
+                on_visit(index, state)
+                visit_time = perf_counter() - began
+                stats.times["visit"] += visit_time
+                stats.times["total"] += visit_time
+    finally:
+        if profiler is not None:
+            (profiler.disable if hasattr(profiler, "disable") else profiler.stop)()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Instrument (and optionally profile) one headless search")
+    parser.add_argument("--search", default="A*", choices=list(searches_by_name))
+    parser.add_argument("--size", type=int, default=300)
+    parser.add_argument("--maze", choices=list(mazes_by_name), help="search a maze instead of random walls")
+    parser.add_argument("--density", type=float, default=.2, help="random wall density")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="run the search under cProfile")
+    parser.add_argument("--top", type=int, default=15, help="profile entries to show")
+    options = parser.parse_args(arguments)
+
+    if options.maze:
+        grid, start, goal = maze_map(options.size, options.maze, options.seed)
+    else:
+        grid, start, goal = random_map(options.size, options.density, options.seed)
+    profiler = cProfile.Profile() if options.profile else None
+    path, stats = instrument_search(searches_by_name[options.search], grid, start, goal, profiler=profiler)
+    print(f"{options.search} on {grid}: {'no path' if path is None else f'path of {len(path)} tiles'}")
+    print(stats.report())
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(options.top)
+
+
+if __name__ == "__main__":
+    main()
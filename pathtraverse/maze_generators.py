@@ -0,0 +1,299 @@
+# Maze generators. They fill the grid with walls and carve paths through the cells, the tiles with odd coordinates,
+# opening the tile between two cells to connect them. Like the searches they are generators: every carved tile is
+# yielded as a (flat index, PATH) event so a front end can play them step by step, and the coords of the cell the maze
+# was started from are returned at the end. generate_maze runs one headless, seeded for reproducible mazes.
+# Cells are numbered like flat tile indexes (cell x * rows + cell y) and the bookkeeping is kept in flat per-cell
+# arrays, so every generator only looks at the 4 neighbors of the cells it touches and runs in linear time
+import random
+from .engine import run_search
+from .grid import PATH
+
+
+def generate_maze(grid, maze, seed=None):  # the whole maze without playing its events, returns the start coords
+    return run_search(maze(grid, random.Random(seed)))
+
+
+def _cells(grid):  # number of cell columns and rows
+    columns, rows = grid.width // 2, grid.height // 2
+    if not columns or not rows:
+        raise ValueError(f"{grid} is too small for a maze")
+    return columns, rows
+
+
+def _cell_tile(cell, rows, height):  # flat tile index of a cell
+    x, y = divmod(cell, rows)
+    return (2 * x + 1) * height + 2 * y + 1
+
+
+def _cell_neighbors(cell, columns, rows):  # N, S, W, E
+    x, y = divmod(cell, rows)
+    neighbors = []
+    if y:
+        neighbors.append(cell - 1)
+    if y < rows - 1:
+        neighbors.append(cell + 1)
+    if x:
+        neighbors.append(cell - rows)
+    if x < columns - 1:
+        neighbors.append(cell + rows)
+    return neighbors
+
+
+def _open(state, tile):  # the move masks are rebuilt once the maze is done
+    state[tile] = PATH
+    return tile, PATH
+
+
+def iterative_backtrack_maze(grid, rng=random):
+    # Depth first: walks to random unvisited neighbors and backs up the stack at dead ends. A cell stays on the stack
+    # until it has no unvisited neighbor left, so every cell is looked at a handful of times
+    columns, rows = _cells(grid)
+    grid.fill_walls()
+    state = grid.state.reshape(-1)
+    height = grid.height
+    visited = bytearray(columns * rows)
+
+    start = rng.randrange(columns * rows)
+    visited[start] = 1
+    yield _open(state, _cell_tile(start, rows, height))
+    stack = [start]
+    while stack:
+        cell = stack[-1]
+        unvisited = [neighbor for neighbor in _cell_neighbors(cell, columns, rows) if not visited[neighbor]]
+        if not unvisited:
+            stack.pop()
+            continue
+        neighbor = rng.choice(unvisited)
+        visited[neighbor] = 1
+        tile, neighbor_tile = _cell_tile(cell, rows, height), _cell_tile(neighbor, rows, height)
+        yield _open(state, (tile + neighbor_tile) // 2)
+        yield _open(state, neighbor_tile)
+        stack.append(neighbor)
+
+    grid.build_moves()
+    return grid.coord(_cell_tile(start, rows, height))
+
+
+def hunt_kill(grid, rng=random):
+    # Random walk until a dead end, then hunt for an unvisited cell next to the visited ones. The hunt goes through the
+    # cells in boustrophedon order (rows snaking back and forth), where consecutive cells are neighbors, outward from
+    # the start cell: every cell between the backward and forward pointers is visited, so the first unvisited cell
+    # past either pointer touches the visited cell just inside it. The pointers only ever move outward, instead of
+    # rows being rescanned on every hunt
+    columns, rows = _cells(grid)
+    grid.fill_walls()
+    state = grid.state.reshape(-1)
+    height = grid.height
+    total = columns * rows
+    visited = bytearray(total)
+
+    def snake_cell(position):
+        y, x = divmod(position, columns)
+        if y & 1:
+            x = columns - 1 - x
+        return x * rows + y
+
+    forward = backward = rng.randrange(total)
+    cell = start = snake_cell(forward)
+    visited[cell] = 1
+    yield _open(state, _cell_tile(cell, rows, height))
+    while True:
+        while True:
+            unvisited = [neighbor for neighbor in _cell_neighbors(cell, columns, rows) if not visited[neighbor]]
+            if not unvisited:
+                break
+            neighbor = rng.choice(unvisited)
+            visited[neighbor] = 1
+            tile, neighbor_tile = _cell_tile(cell, rows, height), _cell_tile(neighbor, rows, height)
+            yield _open(state, (tile + neighbor_tile) // 2)
+            yield _open(state, neighbor_tile)
+            cell = neighbor
+
+        while forward + 1 < total and visited[snake_cell(forward + 1)]:
+            forward += 1
+        while backward > 0 and visited[snake_cell(backward - 1)]:
+            backward -= 1
+        if forward + 1 < total:
+            forward += 1
+            hunted, cell = snake_cell(forward - 1), snake_cell(forward)
+        elif backward > 0:
+            backward -= 1
+            hunted, cell = snake_cell(backward + 1), snake_cell(backward)
+        else:
+            break
+        visited[cell] = 1
+        tile, hunted_tile = _cell_tile(cell, rows, height), _cell_tile(hunted, rows, height)
+        yield _open(state, (tile + hunted_tile) // 2)
+        yield _open(state, tile)
+
+    grid.build_moves()
+    return grid.coord(_cell_tile(start, rows, height))
+
+
+def kruskal_maze(grid, rng=random):
+    # Goes through every wall between two cells in random order and opens it when the cells on its sides aren't
+    # connected yet. Connectivity is a union-find over the cells (path halving, union by size)
+    columns, rows = _cells(grid)
+    grid.fill_walls()
+    state = grid.state.reshape(-1)
+    height = grid.height
+    total = columns * rows
+    parent = list(range(total))
+    size = [1] * total
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    # wall number 2 * cell is the one below the cell, 2 * cell + 1 the one to its right
+    walls = [2 * cell for cell in range(total) if cell % rows < rows - 1]
+    walls += [2 * cell + 1 for cell in range(total - rows)]
+    rng.shuffle(walls)
+    for wall in walls:
+        cell = wall >> 1
+        neighbor = cell + rows if wall & 1 else cell + 1
+        root, neighbor_root = find(cell), find(neighbor)
+        if root == neighbor_root:
+            continue
+        if size[root] < size[neighbor_root]:
+            root, neighbor_root = neighbor_root, root
+        parent[neighbor_root] = root
+        size[root] += size[neighbor_root]
+        tile, neighbor_tile = _cell_tile(cell, rows, height), _cell_tile(neighbor, rows, height)
+        for carved in (tile, (tile + neighbor_tile) // 2, neighbor_tile):
+            if state[carved] != PATH:
+                yield _open(state, carved)
+    if total == 1:
+        yield _open(state, _cell_tile(0, rows, height))
+
+    grid.build_moves()
+    return grid.coord(_cell_tile(rng.randrange(total), rows, height))
+
+
+def prim_maze(grid, rng=random):
+    # Grows the maze from one cell by connecting a random frontier cell (not in the maze, next to it) to a random maze
+    # cell next to it. The frontier is a list with swap-removal, so picking a random cell is O(1)
+    columns, rows = _cells(grid)
+    grid.fill_walls()
+    state = grid.state.reshape(-1)
+    height = grid.height
+    mark = bytearray(columns * rows)  # 1 on the frontier, 2 in the maze
+
+    start = rng.randrange(columns * rows)
+    mark[start] = 2
+    yield _open(state, _cell_tile(start, rows, height))
+    frontier = []
+    for neighbor in _cell_neighbors(start, columns, rows):
+        mark[neighbor] = 1
+        frontier.append(neighbor)
+    while frontier:
+        index = rng.randrange(len(frontier))
+        cell = frontier[index]
+        frontier[index] = frontier[-1]
+        frontier.pop()
+        neighbors = _cell_neighbors(cell, columns, rows)
+        inside = rng.choice([neighbor for neighbor in neighbors if mark[neighbor] == 2])
+        mark[cell] = 2
+        tile, inside_tile = _cell_tile(cell, rows, height), _cell_tile(inside, rows, height)
+        yield _open(state, (tile + inside_tile) // 2)
+        yield _open(state, tile)
+        for neighbor in neighbors:
+            if not mark[neighbor]:
+                mark[neighbor] = 1
+                frontier.append(neighbor)
+
+    grid.build_moves()
+    return grid.coord(_cell_tile(start, rows, height))
+
+
+def eller_maze(grid, rng=random):
+    # Builds the maze one row of cells (same y) at a time and only remembers which set every cell of the current row
+    # is in, so its memory doesn't grow with the height. Neighbors in a row in different sets are joined at random,
+    # then every set continues into the next row at least once. The last row joins all the sets that are left
+    columns, rows = _cells(grid)
+    grid.fill_walls()
+    state = grid.state.reshape(-1)
+    height = grid.height
+    sets = [0] * columns  # set of every cell in the row, 0 for a cell that wasn't reached from the row above
+    next_set = 1
+
+    for y in range(rows):
+        last_row = y == rows - 1
+        members = {}
+        for x in range(columns):
+            if not sets[x]:
+                sets[x] = next_set
+                next_set += 1
+                yield _open(state, _cell_tile(x * rows + y, rows, height))
+            members.setdefault(sets[x], []).append(x)
+
+        for x in range(columns - 1):
+            kept, merged = sets[x], sets[x + 1]
+            if kept == merged or not (last_row or rng.random() < .5):
+                continue
+            if len(members[kept]) < len(members[merged]):
+                kept, merged = merged, kept
+            for member in members[merged]:
+                sets[member] = kept
+            members[kept] += members.pop(merged)
+            tile = _cell_tile(x * rows + y, rows, height)
+            yield _open(state, tile + height)
+        if last_row:
+            break
+
+        below = [0] * columns
+        for cell_set, row_members in members.items():
+            rng.shuffle(row_members)
+            for x in row_members[:rng.randint(1, len(row_members))]:
+                below[x] = cell_set
+                tile = _cell_tile(x * rows + y, rows, height)
+                yield _open(state, tile + 1)
+                yield _open(state, tile + 2)
+        sets = below
+
+    grid.build_moves()
+    return grid.coord(_cell_tile(rng.randrange(columns * rows), rows, height))
+
+
+def wilson_maze(grid, rng=random):
+    # Loop-erased random walks: from every cell that isn't in the maze yet, walk at random until the maze is hit,
+    # only remembering the last way out of every cell (which erases the loops), then carve the remembered route.
+    # Unbiased (every maze is equally likely) but the first walks can wander for a long time on big grids
+    columns, rows = _cells(grid)
+    grid.fill_walls()
+    state = grid.state.reshape(-1)
+    height = grid.height
+    total = columns * rows
+    in_maze = bytearray(total)
+    way_out = [0] * total
+
+    start = rng.randrange(total)
+    in_maze[start] = 1
+    yield _open(state, _cell_tile(start, rows, height))
+    for cell in range(total):
+        walk = cell
+        while not in_maze[walk]:
+            way_out[walk] = rng.choice(_cell_neighbors(walk, columns, rows))
+            walk = way_out[walk]
+        walk = cell
+        while not in_maze[walk]:
+            in_maze[walk] = 1
+            tile, next_tile = _cell_tile(walk, rows, height), _cell_tile(way_out[walk], rows, height)
+            yield _open(state, tile)
+            yield _open(state, (tile + next_tile) // 2)
+            walk = way_out[walk]
+
+    grid.build_moves()
+    return grid.coord(_cell_tile(start, rows, height))
+
+
+mazes_by_name = {
+    "Iterative": iterative_backtrack_maze,
+    "Hunt and Kill": hunt_kill,
+    "Kruskal": kruskal_maze,
+    "Prim": prim_maze,
+    "Eller": eller_maze,
+    "Wilson": wilson_maze
+}
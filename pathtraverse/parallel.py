@@ -0,0 +1,122 @@
+# Parallel batch pathfinding. The grid's state/weight/move arrays are copied once into shared memory, every worker
+# process maps them without copying and answers its share of the queries with a BatchPlanner. For maps too big for
+# that, parallel_jump_point_search has every worker map one wall bits file (grid_io.save_wall_bits) instead
+from multiprocessing import Pool, shared_memory
+import numpy as np
+from .batch import BatchPlanner
+from .engine import get_path_cost
+from .grid import Grid
+from .grid_io import load_wall_bits
+from .wall_bits import jump_point_path
+
+shared_arrays = ["state", "weight", "moves"]
+
+
+class SharedGrid:
+    # Owns the shared memory blocks. Use it as a context manager (or call close()) so the blocks are freed
+    def __init__(self, grid):
+        self.shape = grid.shape
+        self.blocks = []
+        self.specs = {}
+        for name in shared_arrays:
+            array = getattr(grid, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach_grid(specs):  # builds a Grid over the shared blocks, returns it with the blocks that must stay open
+    blocks = []
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+    return Grid(*arrays["state"].shape, scores=False, **arrays), blocks
+
+
+_worker = {}
+
+
+def _init_worker(specs):
+    grid, blocks = attach_grid(specs)
+    _worker["blocks"] = blocks
+    _worker["planner"] = BatchPlanner(grid)
+
+
+def _solve_chunk(chunk):  # chunk is [(query_index, start, goal), ...]
+    results = _worker["planner"].find_paths([(start, goal) for _, start, goal in chunk])
+    return [(query_index, path, cost) for (query_index, _, _), (path, cost) in zip(chunk, results)]
+
+
+def _init_bits_worker(path):
+    _worker["wall_bits"] = load_wall_bits(path, mmap=True)
+
+
+def _jump_chunk(chunk):
+    results = []
+    for query_index, start, goal in chunk:
+        path = jump_point_path(_worker["wall_bits"], start, goal)
+        results.append((query_index, path, np.inf if path is None else get_path_cost(path)))
+    return results
+
+
+def chunk_queries(queries, chunk_size):
+    # groups queries by start first so a start's whole tree is grown in one worker, then cuts the groups into chunks
+    by_start = {}
+    for query_index, (start, goal) in enumerate(queries):
+        by_start.setdefault(tuple(start), []).append((query_index, tuple(start), tuple(goal)))
+    chunks = []
+    chunk = []
+    for group in by_start.values():
+        chunk += group
+        if len(chunk) >= chunk_size:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def parallel_batch_search(grid, queries, processes=None, ordered=True, chunk_size=64):
+    # Generator of (query_index, path, cost). ordered=True yields in query order (each result as soon as everything
+    # before it is done), ordered=False yields results as the workers finish them
+    with SharedGrid(grid) as shared, Pool(processes, _init_worker, (shared.specs,)) as pool:
+        yield from _collect(pool.imap_unordered(_solve_chunk, chunk_queries(queries, chunk_size)), ordered)
+
+
+def parallel_jump_point_search(path, queries, processes=None, ordered=True, chunk_size=1):
+    # Like parallel_batch_search for unweighted maps saved with grid_io.save_wall_bits: the workers memory-map the
+    # file, so the map is in memory once (as bits) whatever the number of workers, and each query is a jump point
+    # search over the bits. The queries share nothing, so by default they are handed out one at a time. There are no
+    # components here (labeling them would unpack the whole map), so a query whose goal is walled off costs a search of
+    # everything its start reaches before it comes back as (query_index, None, np.inf)
+    with Pool(processes, _init_bits_worker, (str(path),)) as pool:
+        yield from _collect(pool.imap_unordered(_jump_chunk, chunk_queries(queries, chunk_size)), ordered)
+
+
+def _collect(chunk_results, ordered):
+    finished = {}
+    next_index = 0
+    for results in chunk_results:
+        if not ordered:
+            yield from results
+            continue
+        for query_index, path, cost in results:
+            finished[query_index] = (path, cost)
+        while next_index in finished:
+            yield (next_index, *finished.pop(next_index))
+            next_index += 1
@@ -0,0 +1,49 @@
+# Batched pygame drawing. Tile changes are buffered and only the dirty rects are painted and pushed to the display,
+# once per frame, however many search steps happened in between. The event queue is pumped every frame so the window
+# stays responsive
+import sys
+import pygame
+
+
+class Renderer:
+    def __init__(self, screen, tile_width, tile_height, fps=60):
+        self.screen = screen
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.dirty = {}  # (x, y) -> color of the tiles changed since the last frame
+
+    def draw(self, x, y, color):
+        self.dirty[x, y] = color
+
+    def flush(self):  # paints the dirty tiles, pushes only their rects and waits for the next frame
+        rects = []
+        for (x, y), color in self.dirty.items():
+            rects.append(pygame.draw.rect(self.screen, color, (x * self.tile_width, y * self.tile_height,
+                                                               self.tile_width, self.tile_height)))
+        if rects:
+            pygame.display.update(rects)
+        self.dirty.clear()
+        self.pump()
+        self.clock.tick(self.fps)
+
+    def draw_grid(self, colors):
+        # Full board redraw from a (width, height, 3) array of tile colors: one blit_array onto a surface with a pixel
+        # per tile, scaled up to the tile size in one call, so it costs the same however many tiles change
+        width, height = colors.shape[:2]
+        surface = pygame.Surface((width, height))
+        pygame.surfarray.blit_array(surface, colors)
+        self.screen.blit(pygame.transform.scale(surface, (width * self.tile_width, height * self.tile_height)), (0, 0))
+        self.redraw()
+
+    def redraw(self):  # for whole screen changes (screen.fill/blit), drops the buffered tiles they replaced
+        self.dirty.clear()
+        pygame.display.flip()
+
+    @staticmethod
+    def pump():  # keeps the OS happy mid-run and still lets the window be closed
+        pygame.event.pump()
+        if pygame.event.peek(pygame.QUIT):
+            pygame.quit()
+            sys.exit()
@@ -0,0 +1,247 @@
+from operator import attrgetter
+from time import perf_counter
+
+
+class PriorityQueue(object):  # Prioritizes Lowest Value Objects
+    # Binary heap of [priority, count, item] entries. positions maps every queued item to its heap slot so
+    # membership is O(1) and a queued item can have its priority changed in O(log n) (decrease-key).
+    # count is the insertion order and breaks ties the same way the old first-minimum list scan did
+    key = None
+
+    def __init__(self):
+        self.queue = []
+        self.positions = {}
+        self.counter = 0
+
+    def __repr__(self):
+        return " ".join([str(entry[2]) for entry in sorted(self.queue)])
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __len__(self):
+        return len(self.queue)
+
+    def is_empty(self):
+        return len(self.queue) == 0
+
+    def priority(self, item):
+        return item if self.key is None else self.key(item)
+
+    def insert(self, item, priority=None):
+        if item in self.positions:
+            self.update(item, priority)
+            return
+        if priority is None:
+            priority = self.priority(item)
+        self.queue.append([priority, self.counter, item])
+        self.counter += 1
+        self.positions[item] = len(self.queue) - 1
+        self._sift_up(len(self.queue) - 1)
+
+    def update(self, item, priority=None):  # decrease-key, also copes with the priority going up
+        if priority is None:
+            priority = self.priority(item)
+        index = self.positions[item]
+        entry = self.queue[index]
+        old_priority = entry[0]
+        entry[0] = priority
+        if priority < old_priority:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def discard(self, item):  # removes an arbitrary item if it is queued
+        index = self.positions.pop(item, None)
+        if index is None:
+            return
+        last = self.queue.pop()
+        if index < len(self.queue):
+            self.queue[index] = last
+            self.positions[last[2]] = index
+            self._sift_down(index)
+            self._sift_up(self.positions[last[2]])
+
+    def peek(self):
+        return self.queue[0][2]
+
+    def peek_priority(self):
+        return self.queue[0][0]
+
+    def remove(self):
+        if not self.queue:
+            raise IndexError("remove from an empty PriorityQueue")
+        last = self.queue.pop()
+        if not self.queue:
+            del self.positions[last[2]]
+            return last[2]
+        deleted = self.queue[0]
+        self.queue[0] = last
+        self.positions[last[2]] = 0
+        del self.positions[deleted[2]]
+        self._sift_down(0)
+        return deleted[2]
+
+    def _sift_up(self, index):
+        queue = self.queue
+        positions = self.positions
+        entry = queue[index]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = queue[parent_index]
+            if entry[:2] < parent[:2]:
+                queue[index] = parent
+                positions[parent[2]] = index
+                index = parent_index
+            else:
+                break
+        queue[index] = entry
+        positions[entry[2]] = index
+
+    def _sift_down(self, index):
+        queue = self.queue
+        positions = self.positions
+        size = len(queue)
+        entry = queue[index]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            right_index = child_index + 1
+            if right_index < size and queue[right_index][:2] < queue[child_index][:2]:
+                child_index = right_index
+            child = queue[child_index]
+            if child[:2] < entry[:2]:
+                queue[index] = child
+                positions[child[2]] = index
+                index = child_index
+            else:
+                break
+        queue[index] = entry
+        positions[entry[2]] = index
+
+
+class AStarQueue(PriorityQueue):  # Prioritizes Lowest f scores
+    key = staticmethod(attrgetter("f"))
+
+
+class GreedyQueue(PriorityQueue):  # Prioritizes Lowest Heuristic Values
+    key = staticmethod(attrgetter("h"))
+
+
+class DijkstraQueue(PriorityQueue):  # Prioritizes Lowest g values
+    key = staticmethod(attrgetter("d"))
+
+
+class BucketQueue(object):  # Dial's algorithm: priorities grouped into buckets of bucket_width
+    # Popping any item of the lowest non-empty bucket is exact for Dijkstra as long as bucket_width is no larger than
+    # the cheapest edge, because nothing in a bucket can improve another item of the same bucket. The queued priorities
+    # never span more than (most expensive edge / bucket_width) + 1 buckets, so the buckets are reused in a circle.
+    # Decrease-key just queues the item again, the outdated entries are skipped when they come up
+    def __init__(self, bucket_width, bucket_count):
+        self.bucket_width = bucket_width
+        self.buckets = [[] for _ in range(bucket_count)]
+        self.priorities = {}
+        self.current = 0  # number of the lowest bucket that may hold items
+
+    def __contains__(self, item):
+        return item in self.priorities
+
+    def __len__(self):
+        return len(self.priorities)
+
+    def is_empty(self):
+        return len(self.priorities) == 0
+
+    def insert(self, item, priority):
+        bucket = int(priority // self.bucket_width)
+        if not self.priorities or bucket < self.current:
+            self.current = bucket
+        self.priorities[item] = priority
+        self.buckets[bucket % len(self.buckets)].append((item, priority))
+
+    update = insert
+
+    def remove(self):
+        if not self.priorities:
+            raise IndexError("remove from an empty BucketQueue")
+        priorities = self.priorities
+        while True:
+            bucket = self.buckets[self.current % len(self.buckets)]
+            while bucket:
+                item, priority = bucket.pop()
+                if priorities.get(item) == priority:
+                    del priorities[item]
+                    return item
+            self.current += 1
+
+
+def counted(queue, stats):  # the queue itself, or a CountingQueue over it when there are stats to record into
+    return queue if stats is None else CountingQueue(queue, stats)
+
+
+class CountingQueue(object):  # wraps a queue and records its operations and their time into an instrument.SearchStats
+    def __init__(self, queue, stats):
+        self.wrapped = queue
+        self.stats = stats
+        self.popped = set()
+        self.discarded = None  # the item the last operation discarded, queuing it again right away is a decrease-key
+
+    def __repr__(self):
+        return repr(self.wrapped)
+
+    def __contains__(self, item):
+        return item in self.wrapped
+
+    def __len__(self):
+        return len(self.wrapped)
+
+    def is_empty(self):
+        return self.wrapped.is_empty()
+
+    def peek(self):
+        return self.wrapped.peek()
+
+    def peek_priority(self):
+        return self.wrapped.peek_priority()
+
+    def insert(self, item, priority=None):
+        stats = self.stats
+        if item in self.wrapped:  # PriorityQueue.insert would update it
+            self.update(item, priority)
+            return
+        began = perf_counter()
+        self.wrapped.insert(item, priority)
+        stats.times["queue"] += perf_counter() - began
+        if item == self.discarded:
+            stats.decrease_keys += 1
+        else:
+            stats.pushes += 1
+            if item in self.popped:
+                stats.reopenings += 1
+        self.discarded = None
+
+    def update(self, item, priority=None):
+        began = perf_counter()
+        self.wrapped.update(item, priority)
+        self.stats.times["queue"] += perf_counter() - began
+        self.stats.decrease_keys += 1
+        self.discarded = None
+
+    def discard(self, item):
+        began = perf_counter()
+        queued = item in self.wrapped
+        self.wrapped.discard(item)
+        self.stats.times["queue"] += perf_counter() - began
+        self.discarded = item if queued else None
+
+    def remove(self):
+        stats = self.stats
+        began = perf_counter()
+        item = self.wrapped.remove()
+        stats.times["queue"] += perf_counter() - began
+        stats.pops += 1
+        self.popped.add(item)
+        stats.open_sizes.append(len(self.wrapped))
+        self.discarded = None
+        return item
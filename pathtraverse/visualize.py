@@ -0,0 +1,535 @@
+# The goal of this project is to gather many search algorithms and visualize them here. visualize() opens the window,
+# pygame is only imported then so the rest of the package doesn't need it
+import numpy as np
+from .grid import Grid, PATH, WALL, START, GOAL, SOLUTION, state_names
+from .engine import get_path_cost, heuristic_searches, searches_by_name
+from .incremental import DStarLite, d_star_lite_steps
+from .fields import get_distance_field
+from .maze_generators import generate_maze, mazes_by_name
+from .grid_io import save_grid, load_grid
+from .instrument import SearchStats, instrumented_steps
+from .heuristics import octile, manhattan, chebyshev, euclidean, zero
+from array import array
+import os
+
+
+def tile_color(x, y, state):  # path tiles get darker the heavier they are
+    color = colors[state_names[state]]
+    if state == PATH and grid.weight[x, y] > 1:
+        heaviness = min((grid.weight[x, y] - 1) / (max(brush_weights) - 1), 1)
+        color = [int(path + (heavy - path) * heaviness) for path, heavy in zip(color, colors["heavy"])]
+    return color
+
+
+def grid_colors():  # tile_color of every tile at once, state codes mapped through the palette
+    rgb = palette[grid.state]
+    heaviness = np.minimum((grid.weight - 1) / (max(brush_weights) - 1), 1)[..., None]
+    tinted = (rgb + (palette_heavy - rgb) * heaviness).astype(np.uint8)
+    return np.where(((grid.state == PATH) & (grid.weight > 1))[..., None], tinted, rgb)
+
+
+def redraw_board():
+    renderer.draw_grid(grid_colors())
+
+
+def show_heatmap():  # the goal's distance field, near tiles hot and far ones cold, until the board is redrawn
+    distance = get_distance_field(grid, goal_coord).distance
+    reachable = distance < np.inf
+    farthest = distance[reachable].max() or 1
+    closeness = (1 - np.where(reachable, distance, 0) / farthest)[..., None]
+    rgb = (palette_far + (palette_near - palette_far) * closeness).astype(np.uint8)
+    rgb[~reachable] = colors["unreachable"]
+    rgb[grid.state == WALL] = colors["wall"]
+    rgb[start_coord] = colors["start"]
+    rgb[goal_coord] = colors["goal"]
+    renderer.draw_grid(rgb)
+
+
+def draw_tile(x, y, state):  # changes a tile, it is painted with the next frame
+    grid.set_state(x, y, state)
+    renderer.draw(x, y, tile_color(x, y, state))
+    return state
+
+
+def on_mouse_press():
+    global start_coord
+    global goal_coord
+
+    mx, my = pygame.mouse.get_pos()
+    x = mx // tile_width
+    y = my // tile_height
+    rb, mb, lb = pygame.mouse.get_pressed()
+    keys = pygame.key.get_pressed()
+    if playing():
+        stop_playback()
+    edited = False
+    if keys[pygame.K_LSHIFT] and (rb or lb):
+        # Shift paints terrain weight, left click with the brush weight and right click back to 1
+        weight = brush_weights[current_brush_index] if rb else 1
+        edited = grid.weight[x, y] != weight
+        grid.set_weight(x, y, weight)
+        draw_tile(x, y, grid.state[x, y])
+    elif rb:
+        if keys[pygame.K_LCTRL]:
+            if not (x, y) in [goal_coord, start_coord]:
+                draw_tile(*start_coord, PATH)
+                start_coord = (x, y)
+                draw_tile(x, y, START)
+                edited = True
+        elif keys[pygame.K_LALT]:
+            if not (x, y) in [goal_coord, start_coord]:
+                draw_tile(*goal_coord, PATH)
+                goal_coord = (x, y)
+                draw_tile(x, y, GOAL)
+                edited = True
+        else:
+            if (x, y) not in [goal_coord, start_coord] and grid.state[x, y] != WALL:
+                draw_tile(x, y, WALL)
+                edited = True
+    elif lb:
+        if grid.state[x, y] == WALL:
+            draw_tile(x, y, PATH)
+            edited = True
+    if edited and replanning():  # D* Lite repairs its last plan and shows the new one
+        reset_board(False)
+        start_playback(solution_steps(current_search_index))
+
+
+def replanning():
+    return planner is not None and searches[current_search_index] is d_star_lite_steps
+
+
+def replan_steps(grid, start, goal, heuristic=octile, stats=None):
+    # D* Lite that keeps its planner between runs, so after an edit only the part of the search the edit affected is
+    # redone. A new goal or heuristic needs a new planner
+    global planner
+    if planner is None or planner.goal != goal or planner.heuristic is not heuristic:
+        if planner is not None:
+            planner.close()
+        planner = DStarLite(grid, start, goal, heuristic)
+    planner.move_start(start)
+    return (yield from planner.plan_steps(stats))
+
+
+def solution_steps(search_type):  # the search and then its solution path, as one run of (index, state) events
+    search = searches[search_type]
+    options = {"heuristic": heuristics[current_heuristic_index]} if search in heuristic_searches else {}
+    if search is d_star_lite_steps:
+        search = replan_steps
+    search = backend_steps(search)
+    if instrument:
+        stats = SearchStats()
+        path = yield from instrumented_steps(stats, search, grid, start_coord, goal_coord, **options)
+        print(stats.report())
+    else:
+        path = yield from search(grid, start_coord, goal_coord, **options)
+    if path:
+        print(f"Goal reached at {goal_coord} after {get_path_cost(path, grid)} units traveled")
+        for coord in reversed(path[1:-1]):
+            grid.set_state(*coord, SOLUTION)
+            yield grid.index(*coord), SOLUTION
+        print("Solution Found")
+    else:
+        print(f"No path from {start_coord} to {goal_coord}")
+
+
+def maze_steps(maze):  # the maze and then the start/goal tiles put back on it
+    global start_coord
+    start_coord = yield from backend_steps(maze)(grid)
+    print(f"Maze started at {start_coord[0]}, {start_coord[1]}")
+    for coord, state in ((start_coord, START), (goal_coord, GOAL)):
+        grid.set_state(*coord, state)
+        yield grid.index(*coord), state
+    print("Finished Maze")
+
+
+def instant_maze(maze):  # generated headless and drawn with one blit
+    global start_coord
+    start_coord = generate_maze(grid, backend_steps(maze))
+    grid.set_state(*start_coord, START)
+    grid.set_state(*goal_coord, GOAL)
+    redraw_board()
+    print(f"Maze started at {start_coord[0]}, {start_coord[1]}")
+
+
+# Playback. The running search/maze generator is advanced a number of steps per frame, and every event it yields is
+# appended to a compact log (tile, state before, state after). Stepping back only repaints tiles from the log, the
+# generator and grid.state stay where they are, and stepping forward again replays the log before the generator is
+# resumed. shown holds the state codes that are on screen
+def start_playback(steps, maze=False):
+    global playback, playback_maze, paused, log_position, shown
+    playback = steps
+    playback_maze = maze
+    paused = False
+    del log_index[:], log_before[:], log_after[:]
+    log_position = 0
+    shown = grid.state.reshape(-1).copy()
+
+
+def stop_playback():  # drops the running generator, the board is left at the furthest step it reached
+    while log_position < len(log_index):
+        step_forward()
+    drop_playback()
+
+
+def drop_playback():
+    # A maze writes grid.state directly and only rebuilds the move masks when it finishes, so a maze stopped halfway
+    # has them rebuilt here and the listeners (components, caches) told the walls changed
+    global playback
+    if playback is not None:
+        playback = None
+        if playback_maze:
+            grid.build_moves()
+            grid.changed()
+
+
+def playing():
+    return playback is not None or log_position < len(log_index)
+
+
+def show_tile(index, state):
+    shown[index] = state
+    x, y = grid.coord(index)
+    renderer.draw(x, y, tile_color(x, y, state))
+
+
+def step_forward():  # returns False once there is nothing left to play
+    global playback, log_position
+    if log_position < len(log_index):
+        show_tile(log_index[log_position], log_after[log_position])
+    elif playback is not None:
+        try:
+            index, state = next(playback)
+        except StopIteration:
+            playback = None
+            return False
+        log_index.append(index)
+        log_before.append(shown[index])
+        log_after.append(state)
+        show_tile(index, state)
+    else:
+        return False
+    log_position += 1
+    return True
+
+
+def step_back():
+    global log_position
+    if log_position:
+        log_position -= 1
+        show_tile(log_index[log_position], log_before[log_position])
+
+
+def advance(steps):
+    for _ in range(steps):
+        if not step_forward():
+            break
+
+
+def toggle_pause():
+    global paused
+    paused = not paused
+    print("Paused" if paused else "Playing")
+
+
+def reset_board(hard=True):
+    global log_position, planner
+    drop_playback()
+    del log_index[:], log_before[:], log_after[:]
+    log_position = 0
+    if hard:
+        if planner is not None:
+            planner.close()
+            planner = None
+        grid.reset()
+    else:
+        grid.clear_search()
+    grid.set_state(*start_coord, START)
+    grid.set_state(*goal_coord, GOAL)
+    redraw_board()
+
+
+def backend_steps(steps):  # the compiled version of a search/maze when that backend is selected and it has one
+    if backend_names[current_backend_index] != "Numba":
+        return steps
+    from . import accel  # only imported (and Numba with it) once the compiled backend is asked for
+    return accel.accelerated(steps)
+
+
+def update_caption():
+    pygame.display.set_caption(f"{search_names[current_search_index]} algorithm | "
+                               f"{backend_names[current_backend_index]} backend | "
+                               f"{heuristic_names[current_heuristic_index]} heuristic | "
+                               f"{maze_names[current_maze_index]} maze generation")
+
+
+def change_search(index):
+    global current_search_index
+    if index == "next":
+        if current_search_index >= len(searches) - 1:
+            current_search_index = 0
+        else:
+            current_search_index += 1
+    elif index == "back":
+        if current_search_index <= 0:
+            current_search_index = len(searches) - 1
+        else:
+            current_search_index += -1
+    else:
+        current_search_index = index
+    update_caption()
+
+
+def change_maze(index):
+    global current_maze_index
+    if index == "next":
+        if current_maze_index >= len(mazes) - 1:
+            current_maze_index = 0
+        else:
+            current_maze_index += 1
+    elif index == "back":
+        if current_maze_index <= 0:
+            current_maze_index = len(mazes) - 1
+        else:
+            current_maze_index += -1
+    else:
+        current_maze_index = index
+    update_caption()
+
+
+def change_brush():
+    global current_brush_index
+    current_brush_index = (current_brush_index + 1) % len(brush_weights)
+    print(f"Painting weight {brush_weights[current_brush_index]}")
+
+
+def load_weights():
+    try:
+        grid.load_weights(weights_file)
+    except (OSError, ValueError) as error:
+        print(f"Couldn't load weights from {weights_file}: {error}")
+        return
+    print(f"Loaded weights from {weights_file}")
+    redraw_board()
+
+
+def save_board():
+    save_grid(grid, board_file, start_coord, goal_coord)
+    print(f"Saved the board to {board_file}")
+
+
+def load_board():
+    global start_coord, goal_coord
+    try:
+        loaded, start, goal = load_grid(board_file)
+    except (OSError, ValueError) as error:
+        print(f"Couldn't load a board from {board_file}: {error}")
+        return
+    if loaded.shape != grid.shape:
+        print(f"{board_file} is {loaded.width}x{loaded.height}, the board is {grid_width}x{grid_height}")
+        return
+    grid.state[...] = loaded.state
+    grid.weight[...] = loaded.weight
+    grid.build_moves()
+    grid.changed()
+    start_coord = start or start_coord
+    goal_coord = goal or goal_coord
+    reset_board(False)
+    print(f"Loaded the board from {board_file}")
+
+
+def change_backend():
+    global current_backend_index
+    from . import accel
+    if not accel.available:
+        print("Numba isn't installed (pip install numba), only the Python backend is available")
+        return
+    current_backend_index = (current_backend_index + 1) % len(backend_names)
+    if backend_names[current_backend_index] == "Numba":
+        print("Compiling the Numba kernels...")
+        accel.warm_up()
+    print(f"Running A*, Dijkstra, BFS and the Iterative maze with the {backend_names[current_backend_index]} backend")
+    update_caption()
+
+
+def toggle_instrument():
+    global instrument
+    instrument = not instrument
+    print(f"Instrumentation is {instrument}")
+
+
+def change_heuristic():
+    global current_heuristic_index
+    current_heuristic_index = (current_heuristic_index + 1) % len(heuristics)
+    update_caption()
+
+
+# Initial setup
+colors = {
+    "wall": (0, 0, 0),
+    "closed": (0, 0, 255),
+    "open": (102, 153, 255),
+    "path": (255, 255, 255),
+    "normal": (255, 255, 255),
+    "goal": (255, 153, 0),
+    "start": (255, 0, 0),
+    "solution": (0, 255, 0),
+    "heavy": (153, 102, 51),
+    "near": (255, 230, 0),
+    "far": (60, 0, 110),
+    "unreachable": (128, 128, 128)
+}
+palette = np.array([colors[name] for name in state_names], np.uint8)
+palette_heavy = np.array(colors["heavy"], float)
+palette_near = np.array(colors["near"], float)
+palette_far = np.array(colors["far"], float)
+search_names = list(searches_by_name)
+searches = list(searches_by_name.values())
+# Python runs every search as written in engine.py, Numba swaps in the compiled kernels of accel.py where there is one
+backend_names = [
+    "Python",
+    "Numba"
+]
+heuristic_names = [
+    "Octile",
+    "Manhattan",
+    "Chebyshev",
+    "Euclidean",
+    "Zero"
+]
+heuristics = [
+    octile,
+    manhattan,
+    chebyshev,
+    euclidean,
+    zero
+]
+brush_weights = [
+    2,
+    5,
+    10
+]
+maze_names = list(mazes_by_name)
+mazes = list(mazes_by_name.values())
+
+# playback speed in search steps per frame
+steps_per_frame = 20
+fast_steps_per_frame = 2000
+fast_step = False
+playback = None
+playback_maze = False  # the running generator is a maze, see drop_playback
+paused = False
+log_index = array("i")
+log_before = array("B")
+log_after = array("B")
+log_position = 0
+shown = None
+planner = None  # the D* Lite planner kept between runs, see replan_steps
+current_search_index = 0
+current_maze_index = 0
+current_heuristic_index = 0
+current_backend_index = 0
+current_brush_index = 0
+weights_file = "weights.npy"
+board_file = "board.grid"
+instrument = False  # print search counters and phase timings after every search
+# set up by visualize()
+pygame = screen = renderer = grid = None
+grid_width = grid_height = tile_width = tile_height = 0
+start_coord = goal_coord = None
+# Initial setup ^
+
+
+def visualize(width=100, height=100, display_size=800, weights=None):
+    # Opens a window for a width x height board, its longest side display_size pixels, and runs it until the window is
+    # closed. weights is the file l loads the terrain weights from
+    global pygame, screen, renderer, grid, grid_width, grid_height, tile_width, tile_height, start_coord, goal_coord
+    global weights_file
+    import pygame
+    from .render import Renderer
+    grid_width, grid_height = width, height
+    tile_width = tile_height = max(display_size // max(width, height), 1)
+    weights_file = weights or weights_file
+
+    os.environ['SDL_VIDEO_CENTERED'] = "0"
+    pygame.init()
+    screen = pygame.display.set_mode((tile_width * width, tile_height * height))
+    renderer = Renderer(screen, tile_width, tile_height, fps=60)
+    pygame.key.set_repeat(300, 20)  # holding , or . keeps stepping
+    grid = Grid(width, height)
+    goal_coord = (width - 1, height - 1)
+    start_coord = (0, 0)
+    update_caption()
+    reset_board(True)
+    run()
+    pygame.quit()
+
+
+def run():  # the event loop, until the window is closed or Escape is pressed
+    global paused, fast_step
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    print("Quitting")
+                    return
+                if event.key == pygame.K_KP_ENTER or event.key == pygame.K_RETURN:
+                    print("Getting Solution")
+                    reset_board(False)
+                    start_playback(solution_steps(current_search_index))
+                if event.key == pygame.K_F5:
+                    reset_board(True)
+                if event.key == pygame.K_m:
+                    reset_board(True)
+                    grid.fill_walls()
+                    redraw_board()
+                    start_playback(maze_steps(mazes[current_maze_index]), maze=True)
+                if event.key == pygame.K_n:
+                    reset_board(True)
+                    instant_maze(mazes[current_maze_index])
+                if event.key == pygame.K_SPACE:
+                    toggle_pause()
+                if event.key == pygame.K_PERIOD:
+                    paused = True
+                    step_forward()
+                if event.key == pygame.K_COMMA:
+                    paused = True
+                    step_back()
+                if event.key == pygame.K_RIGHT:
+                    change_search("next")
+                if event.key == pygame.K_LEFT:
+                    change_search("back")
+                if event.key == pygame.K_UP:
+                    change_maze("next")
+                if event.key == pygame.K_DOWN:
+                    change_maze("back")
+                if event.key == pygame.K_w:
+                    change_brush()
+                if event.key == pygame.K_l:
+                    reset_board(False)
+                    load_weights()
+                if event.key == pygame.K_F2:
+                    save_board()
+                if event.key == pygame.K_F3:
+                    reset_board(False)
+                    load_board()
+                if event.key == pygame.K_i:
+                    toggle_instrument()
+                if event.key == pygame.K_h:
+                    change_heuristic()
+                if event.key == pygame.K_f:
+                    reset_board(False)
+                    show_heatmap()
+                if event.key == pygame.K_c:
+                    change_backend()
+                if event.key == pygame.K_s:
+                    fast_step = not fast_step
+                    print(f"Fast step is {fast_step}")
+            if True in pygame.mouse.get_pressed():
+                on_mouse_press()
+
+        if not paused and playing():
+            advance(fast_steps_per_frame if fast_step else steps_per_frame)
+        renderer.flush()
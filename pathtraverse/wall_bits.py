@@ -0,0 +1,279 @@
+# Walkability packed 1 bit per tile, for maps too big for a byte per tile (10k x 10k is 12.5 MB a copy instead of
+# 100 MB). The bits are kept twice, in 64 bit words along every column (y) and along every row (x), so a straight
+# scan in either direction tests 64 tiles per word operation instead of one tile per step. The board is padded with a
+# ring of walls, so x/y can go one tile past the edges without a bounds check (padded coords are x + 1, y + 1).
+# The jump point search scans (see engine.jump_point_steps and jump_point_path below) run on it, and it can be saved
+# and memory-mapped (grid_io.save_wall_bits/load_wall_bits) so worker processes share one copy of a map
+import numpy as np
+from .grid import WALL
+from .heuristics import octile
+from .tile_queues import PriorityQueue
+
+FULL = (1 << 64) - 1
+
+
+def get_wall_bits(grid):  # the grid's WallBits, packed on first use and kept up to date from then on
+    if grid.wall_bits is None:
+        grid.wall_bits = WallBits.from_grid(grid)
+        grid.listeners.append(grid.wall_bits.tile_changed)
+    elif grid.wall_bits.stale:
+        grid.wall_bits.pack(grid.state)
+    return grid.wall_bits
+
+
+def pack_bits(walkable):  # rows of a bool array -> rows of little endian 64 bit words (bit n of a row is word n // 64)
+    packed = np.packbits(walkable, axis=1, bitorder="little")
+    packed = np.pad(packed, ((0, 0), (0, -packed.shape[1] % 8)))
+    return np.ascontiguousarray(packed).view("<u8")
+
+
+class WallBits:
+    def __init__(self, width, height, columns, rows):
+        # columns[x + 1] holds the bits of the tiles (x, 0..height - 1) at bits 1..height, rows[y + 1] those of the
+        # tiles (0..width - 1, y) at bits 1..width. A set bit is walkable
+        self.width = width
+        self.height = height
+        self.columns = columns
+        self.rows = rows
+        self.column_stride = columns.shape[1]  # words per column
+        self.row_stride = rows.shape[1]
+        # flat views that index to plain ints, a lot faster than indexing the arrays
+        self.column_words = memoryview(columns.reshape(-1)).cast("B").cast("Q")
+        self.row_words = memoryview(rows.reshape(-1)).cast("B").cast("Q")
+        self.grid = None  # the grid it follows, None for bits loaded from a file
+        self.stale = False  # the whole grid changed, packed again by get_wall_bits
+
+    @classmethod
+    def from_grid(cls, grid):
+        walkable = np.pad(grid.state != WALL, 1)
+        wall_bits = cls(grid.width, grid.height, pack_bits(walkable), pack_bits(walkable.T))
+        wall_bits.grid = grid
+        return wall_bits
+
+    def pack(self, state):  # packs a state array of the same size again, in place
+        walkable = np.pad(state != WALL, 1)
+        self.columns[...] = pack_bits(walkable)
+        self.rows[...] = pack_bits(walkable.T)
+        self.stale = False
+
+    def __repr__(self):
+        return f"WallBits {self.width}x{self.height}"
+
+    def close(self):  # stops following the grid's edits
+        if self.grid is not None:
+            if self.tile_changed in self.grid.listeners:
+                self.grid.listeners.remove(self.tile_changed)
+            if self.grid.wall_bits is self:
+                self.grid.wall_bits = None
+
+    def tile_changed(self, x=None, y=None):
+        if x is None:
+            self.stale = True
+        elif not self.stale:
+            self.set_walkable(x, y, self.grid.state[x, y] != WALL)
+
+    def walkable(self, x, y):  # x, y can be one tile outside the board, which is a wall
+        x += 1
+        y += 1
+        return self.column_words[x * self.column_stride + (y >> 6)] >> (y & 63) & 1
+
+    def block(self, x, y):
+        # the 3x3 tiles around padded x, y (not on the wall ring) as 9 bits, tile x + i, y + j at bit 3 * i + j + 4
+        words, stride = self.column_words, self.column_stride
+        y -= 1
+        word = y >> 6
+        shift = y & 63
+        index = (x - 1) * stride + word
+        if shift <= 61:
+            return (words[index] >> shift & 7 | (words[index + stride] >> shift & 7) << 3
+                    | (words[index + 2 * stride] >> shift & 7) << 6)
+        around = 0
+        for column in range(3):  # the three tiles straddle two words
+            pair = words[index] | words[index + 1] << 64
+            around |= (pair >> shift & 7) << 3 * column
+            index += stride
+        return around
+
+    def set_walkable(self, x, y, walkable):
+        x += 1
+        y += 1
+        for words, index, bit in ((self.column_words, x * self.column_stride + (y >> 6), y & 63),
+                                  (self.row_words, y * self.row_stride + (x >> 6), x & 63)):
+            words[index] = words[index] | 1 << bit if walkable else words[index] & ~(1 << bit) & FULL
+
+    def to_state(self):  # the walls as Grid.state codes (PATH/WALL)
+        walkable = np.unpackbits(self.columns.view(np.uint8), axis=1, count=self.height + 2, bitorder="little")
+        return np.where(walkable[1:-1, 1:-1], 0, WALL).astype(np.uint8)
+
+    def scan(self, x, y, dx, dy, goal):
+        # The straight jump from padded x, y going dx, dy (one of them 0): the first tile that is the goal (padded
+        # coords) or has a forced neighbor, a wall beside the line with the tile after it open, in padded coords. None
+        # when a wall comes first. A word at a time: the walls of the line and the forced tiles of both sides are
+        # candidates, and the lowest (highest going backwards) candidate bit is where the scan stops
+        if dx:
+            words, stride, position, step = self.row_words, self.row_stride, x, dx
+            line = y * stride
+            target = goal[0] if goal[1] == y else -1
+        else:
+            words, stride, position, step = self.column_words, self.column_stride, y, dy
+            line = x * stride
+            target = goal[1] if goal[0] == x else -1
+        index = line + (position >> 6)
+        goal_index = line + (target >> 6) if target >= 0 and (target - position) * step >= 0 else -1
+        if step > 0:
+            last = line + stride - 1
+            keep = FULL << (position & 63) & FULL  # the bits from position on
+            while True:
+                if index < last:  # the side words with the first bit of the next word, which decides bit 63
+                    before = words[index - stride] | words[index - stride + 1] << 64
+                    after = words[index + stride] | words[index + stride + 1] << 64
+                else:
+                    before = words[index - stride]
+                    after = words[index + stride]
+                open_line = words[index]
+                candidates = (before >> 1 & ~before | after >> 1 & ~after | ~open_line) & keep
+                if index == goal_index:
+                    candidates |= 1 << (target & 63)
+                if candidates:
+                    bit = (candidates & -candidates).bit_length() - 1
+                    break
+                index += 1
+                keep = FULL
+        else:
+            keep = FULL >> (63 - (position & 63))  # the bits up to position
+            while True:
+                if index > line:  # the last bit of the word before decides bit 0
+                    before = words[index - stride] << 1 | words[index - stride - 1] >> 63
+                    after = words[index + stride] << 1 | words[index + stride - 1] >> 63
+                else:
+                    before = words[index - stride] << 1
+                    after = words[index + stride] << 1
+                open_line = words[index]
+                candidates = (before & ~(before >> 1) | after & ~(after >> 1) | ~open_line) & keep
+                if index == goal_index:
+                    candidates |= 1 << (target & 63)
+                if candidates:
+                    bit = candidates.bit_length() - 1
+                    break
+                index -= 1
+                keep = FULL
+        if not open_line >> bit & 1:
+            return None
+        found = (index - line) << 6 | bit
+        return (found, y) if dx else (x, found)
+
+
+def pruned_steps(wall_bits, x, y, dx, dy):  # natural + forced neighbors when arriving at padded x, y going dx, dy
+    around = wall_bits.block(x, y)
+    steps = []
+    if dx and dy:
+        open_x = around >> 4 + 3 * dx & 1
+        open_y = around >> 4 + dy & 1
+        if open_y:
+            steps.append((0, dy))
+        if open_x:
+            steps.append((dx, 0))
+        if open_y or open_x:
+            steps.append((dx, dy))
+        if not around >> 4 - 3 * dx & 1 and open_y:
+            steps.append((-dx, dy))
+        if not around >> 4 - dy & 1 and open_x:
+            steps.append((dx, -dy))
+    elif dx:
+        if around >> 4 + 3 * dx & 1:
+            steps.append((dx, 0))
+            if not around >> 5 & 1:
+                steps.append((dx, 1))
+            if not around >> 3 & 1:
+                steps.append((dx, -1))
+    else:
+        if around >> 4 + dy & 1:
+            steps.append((0, dy))
+            if not around >> 7 & 1:
+                steps.append((1, dy))
+            if not around >> 1 & 1:
+                steps.append((-1, dy))
+    return steps
+
+
+def jump(wall_bits, x, y, dx, dy, goal):  # first jump point reached from padded x, y going dx, dy, None for none
+    if not (dx and dy):
+        return wall_bits.scan(x, y, dx, dy, goal)
+    words, stride = wall_bits.column_words, wall_bits.column_stride
+    # bits of block(): the tiles that make a forced neighbor (a wall beside the run with the tile past it open), and
+    # the two tiles the next diagonal step needs one of
+    behind_x, behind_x_ahead_y = 4 - 3 * dx, 4 - 3 * dx + dy
+    behind_y, ahead_x_behind_y = 4 - dy, 4 + 3 * dx - dy
+    ahead_x, ahead_y = 4 + 3 * dx, 4 + dy
+    while True:
+        if not words[x * stride + (y >> 6)] >> (y & 63) & 1:
+            return None
+        if (x, y) == goal:
+            return x, y
+        around = wall_bits.block(x, y)
+        if (around >> behind_x_ahead_y & 1 and not around >> behind_x & 1) \
+                or (around >> ahead_x_behind_y & 1 and not around >> behind_y & 1):
+            return x, y
+        open_x = around >> ahead_x & 1
+        open_y = around >> ahead_y & 1
+        if (open_x and wall_bits.scan(x + dx, y, dx, 0, goal) is not None) \
+                or (open_y and wall_bits.scan(x, y + dy, 0, dy, goal) is not None):
+            return x, y
+        if not (open_x or open_y):
+            return None
+        x += dx
+        y += dy
+
+
+def jump_point_path(wall_bits, start, goal, heuristic=octile):
+    # Jump point search over the bits alone, without a Grid: the scores are kept in dicts for the jump points it
+    # touches, so a worker needs nothing per tile but a (shared, memory-mapped) WallBits. Returns the coords from start
+    # to goal tile by tile, None when there is no path. Every move costs its length, like JPS on an unweighted grid
+    if not (wall_bits.walkable(*start) and wall_bits.walkable(*goal)):
+        return None
+    start = (start[0] + 1, start[1] + 1)
+    goal = (goal[0] + 1, goal[1] + 1)
+    g = {start: 0.0}
+    parent = {start: None}
+    closed = set()
+    open_queue = PriorityQueue()
+    open_queue.insert(start, heuristic(abs(start[0] - goal[0]), abs(start[1] - goal[1])))
+    while not open_queue.is_empty():
+        current = open_queue.remove()
+        if current == goal:
+            break
+        closed.add(current)
+        x, y = current
+        if parent[current] is None:
+            neighbor_steps = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx or dy)
+                              and wall_bits.walkable(x + dx - 1, y + dy - 1)
+                              and (not (dx and dy) or wall_bits.walkable(x + dx - 1, y - 1)
+                                   or wall_bits.walkable(x - 1, y + dy - 1))]
+        else:
+            parent_x, parent_y = parent[current]
+            neighbor_steps = pruned_steps(wall_bits, x, y, (x > parent_x) - (x < parent_x),
+                                          (y > parent_y) - (y < parent_y))
+        for dx, dy in neighbor_steps:
+            neighbor = jump(wall_bits, x + dx, y + dy, dx, dy, goal)
+            if neighbor is None or neighbor in closed:
+                continue
+            new_g = g[current] + octile(abs(neighbor[0] - x), abs(neighbor[1] - y))
+            if new_g < g.get(neighbor, np.inf):
+                g[neighbor] = new_g
+                parent[neighbor] = current
+                open_queue.insert(neighbor, new_g + heuristic(abs(neighbor[0] - goal[0]), abs(neighbor[1] - goal[1])))
+    if goal not in parent:
+        return None
+
+    jump_points = [goal]
+    while parent[jump_points[-1]] is not None:
+        jump_points.append(parent[jump_points[-1]])
+    jump_points.reverse()
+    path = [(start[0] - 1, start[1] - 1)]
+    for (x, y), (next_x, next_y) in zip(jump_points, jump_points[1:]):  # the tiles between jump points
+        dx, dy = (next_x > x) - (next_x < x), (next_y > y) - (next_y < y)
+        while (x, y) != (next_x, next_y):
+            x += dx
+            y += dy
+            path.append((x - 1, y - 1))
+    return path